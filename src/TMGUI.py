@@ -6,7 +6,12 @@ except ImportError:  # python 2
     import ttk, ScrolledText as scrolledtext, tkFileDialog as filedialog
 
 from turing_machines import *
-import os
+from tm_trace import trace_reader
+import base64, os
+try:  # the space-time view needs numpy
+    import spacetime
+except ImportError:
+    spacetime = None
 
 WIDTH = 1280
 HEIGHT = 690
@@ -19,7 +24,10 @@ class TMGUI:
 
     def __init__(self, master):
         self.tm = None
+        self.trace = None
         self._jobs = []
+        self.lanes = None
+        self._laneJob = None
 
         self.main = master
         self.main.title("Turing Machine Simulator")
@@ -60,6 +68,11 @@ class TMGUI:
         self.frameText = tk.Frame(self.tabsSim)
         self.tabsSim.add(self.frameTape, text='  Tape  ')
         self.tabsSim.add(self.frameText, text='  Text  ')
+        self.frameSpaceTime = tk.Frame(self.tabsSim)
+        if spacetime != None:
+            self.tabsSim.add(self.frameSpaceTime, text='  Space-Time  ')
+        self.frameLanes = tk.Frame(self.tabsSim)
+        self.tabsSim.add(self.frameLanes, text='  Lanes  ')
         self.tabsSim.grid(row=2, column=0, columnspan=3)
 
         # Check boxes
@@ -73,7 +86,12 @@ class TMGUI:
         self.checkbox2Tape = tk.Checkbutton(
             self.frameCheck, text="Two Tape", var=self.two_tape, onvalue=True, offvalue=False)
         self.checkbox2Tape.grid(row=1, sticky='w')
+        self.run_length = tk.BooleanVar()
+        self.checkboxRunLength = tk.Checkbutton(
+            self.frameCheck, text="Run-length Tape", var=self.run_length, onvalue=True, offvalue=False)
+        self.checkboxRunLength.grid(row=2, sticky='w')
         self.two_tape.trace("w", self.setTwoTape)
+        self.run_length.trace("w", self.setRunLength)
         self.bidirectional.trace("w", self.setBidirectional)
         self.frameCheck.grid(row=3, column=2)
 
@@ -91,6 +109,13 @@ class TMGUI:
         self.textDelay.insert(0, "0.1")
         self.textDelay.pack(side='right')
         self.frameDelay.grid(row=1, column=0, pady=5, padx=5)
+        self.frameBudget = tk.Frame(self.frameRun)
+        tk.Label(self.frameBudget, text="History (MB)").pack(side='left', padx=3)
+        self.textHistoryBudget = tk.Entry(self.frameBudget, relief='groove', width=5)
+        self.textHistoryBudget.insert(0, str(HISTORY_BUDGET // 2**20))
+        self.textHistoryBudget.bind('<Return>', self.setHistoryBudget)
+        self.textHistoryBudget.pack(side='right')
+        self.frameBudget.grid(row=2, column=0, columnspan=2, pady=5, padx=5)
         self.frameRun.grid(row=3, column=0)
 
         self.frameStep = tk.Frame(self.frameSim)
@@ -101,6 +126,43 @@ class TMGUI:
         self.buttonStepBack.grid(row=1, pady=5)
         self.frameStep.grid(row=3, column=1)
 
+        # Trace replay
+        self.frameTrace = tk.Frame(self.frameSim)
+        self.buttonOpenTrace = tk.Button(
+            self.frameTrace, width=10, relief='groove', text="Open Trace", command=self.openTrace)
+        self.buttonOpenTrace.grid(row=0, column=0, pady=5, padx=5)
+        self.buttonTraceBack = tk.Button(self.frameTrace, width=2, relief='groove', text="<", command=self.traceBack)
+        self.buttonTraceBack.grid(row=0, column=1, pady=5, padx=5)
+        tk.Label(self.frameTrace, text="Step").grid(row=0, column=2)
+        self.textTraceStep = tk.Entry(self.frameTrace, relief='groove', width=10)
+        self.textTraceStep.bind('<Return>', self.gotoTraceStep)
+        self.textTraceStep.grid(row=0, column=3, padx=3)
+        self.labelTraceSteps = tk.Label(self.frameTrace, width=12, anchor='w', text="")
+        self.labelTraceSteps.grid(row=0, column=4)
+        self.buttonTraceGo = tk.Button(self.frameTrace, width=4, relief='groove', text="Go", command=self.gotoTraceStep)
+        self.buttonTraceGo.grid(row=0, column=5, pady=5, padx=5)
+        self.buttonTraceForward = tk.Button(
+            self.frameTrace, width=2, relief='groove', text=">", command=self.traceForward)
+        self.buttonTraceForward.grid(row=0, column=6, pady=5, padx=5)
+        self.frameTrace.grid(row=4, column=0, columnspan=3)
+
+        # Breakpoints
+        self.frameBreak = tk.Frame(self.frameSim)
+        tk.Label(
+            self.frameBreak, justify='left',
+            text="Breakpoints, one per line:\nstate q\ntransition q c\nstep n\ncell k\nhead p").grid(
+                row=0, column=0, rowspan=2, padx=5)
+        self.textBreakpoints = tk.Text(self.frameBreak, height=5, width=30)
+        self.textBreakpoints.grid(row=0, column=1, rowspan=2, padx=5)
+        self.buttonRunToBreak = tk.Button(
+            self.frameBreak, width=12, relief='groove', text="Run to Break", command=self.runToBreak)
+        self.buttonRunToBreak.grid(row=0, column=2, padx=5)
+        self.frameBreak.grid(row=5, column=0, columnspan=3, pady=5)
+
+        # Memory status
+        self.labelMemory = tk.Label(self.frameSim, anchor='w', text="")
+        self.labelMemory.grid(row=6, column=0, columnspan=3, sticky='w')
+
         # Tape frame
         self.canvasSimOut = tk.Canvas(self.frameTape, bg="#c4c4c4", width=852, height=500)
         self.drawFirstTape()
@@ -110,6 +172,62 @@ class TMGUI:
         self.textSimOut = scrolledtext.ScrolledText(self.frameText, state='disabled', height=10, width=55, wrap=tk.WORD)
         self.textSimOut.pack(expand=1, fill='both')
 
+        # Space-Time Frame
+        self.spaceTimeImage = None
+        self.spaceTimeArray = None
+        self.spaceTimeZoom = None
+        self.spaceTimeHistories = None
+        self.spaceTimeFirst = 0
+        self.frameSpaceTimeControls = tk.Frame(self.frameSpaceTime)
+        self.buttonRender = tk.Button(
+            self.frameSpaceTimeControls, width=10, relief='groove', text="Render", command=self.renderSpaceTime)
+        self.buttonRender.grid(row=0, column=0, pady=5, padx=5)
+        self.buttonZoomIn = tk.Button(
+            self.frameSpaceTimeControls, width=10, relief='groove', text="Zoom In", command=self.zoomInSpaceTime)
+        self.buttonZoomIn.grid(row=0, column=1, pady=5, padx=5)
+        self.buttonZoomOut = tk.Button(
+            self.frameSpaceTimeControls, width=10, relief='groove', text="Zoom Out", command=self.zoomOutSpaceTime)
+        self.buttonZoomOut.grid(row=0, column=2, pady=5, padx=5)
+        self.buttonExportPNG = tk.Button(
+            self.frameSpaceTimeControls, width=10, relief='groove', text="Export PNG", command=self.exportSpaceTime)
+        self.buttonExportPNG.grid(row=0, column=3, pady=5, padx=5)
+        self.labelZoom = tk.Label(self.frameSpaceTimeControls, width=20, text="")
+        self.labelZoom.grid(row=0, column=4, pady=5, padx=5)
+        self.frameSpaceTimeControls.pack(side='top')
+        self.canvasSpaceTime = tk.Canvas(self.frameSpaceTime, bg="#c4c4c4", width=832, height=450)
+        # only the steps that fit in the canvas are rendered, so the vertical scrollbar moves through the steps itself
+        self.scrollSpaceTimeY = tk.Scrollbar(self.frameSpaceTime, orient='vertical', command=self.scrollSpaceTime)
+        self.scrollSpaceTimeX = tk.Scrollbar(
+            self.frameSpaceTime, orient='horizontal', command=self.canvasSpaceTime.xview)
+        self.canvasSpaceTime.config(xscrollcommand=self.scrollSpaceTimeX.set)
+        self.scrollSpaceTimeY.pack(side='right', fill='y')
+        self.scrollSpaceTimeX.pack(side='bottom', fill='x')
+        self.canvasSpaceTime.pack(expand=1, fill='both')
+
+        # Lanes Frame
+        self.frameLaneControls = tk.Frame(self.frameLanes)
+        tk.Label(self.frameLaneControls, text="Inputs, one\nper lane:").grid(row=0, column=0, rowspan=2, padx=5)
+        self.textLaneInputs = tk.Text(self.frameLaneControls, height=4, width=30)
+        self.textLaneInputs.grid(row=0, column=1, rowspan=2, padx=5)
+        self.buttonRunLanes = tk.Button(
+            self.frameLaneControls, width=10, relief='groove', text="Run Lanes", command=self.runLanes)
+        self.buttonRunLanes.grid(row=0, column=2, pady=5, padx=5)
+        self.buttonStopLanes = tk.Button(
+            self.frameLaneControls, width=10, relief='groove', text="Stop Lanes", command=self.stopLanes)
+        self.buttonStopLanes.grid(row=0, column=3, pady=5, padx=5)
+        self.buttonStepLanes = tk.Button(
+            self.frameLaneControls, width=10, relief='groove', text="Step Lanes", command=self.stepLanes)
+        self.buttonStepLanes.grid(row=1, column=2, pady=5, padx=5)
+        self.buttonResetLanes = tk.Button(
+            self.frameLaneControls, width=10, relief='groove', text="Reset Lanes", command=self.resetLanes)
+        self.buttonResetLanes.grid(row=1, column=3, pady=5, padx=5)
+        self.frameLaneControls.pack(side='top')
+        self.canvasLanes = tk.Canvas(self.frameLanes, bg="#c4c4c4", width=832, height=400)
+        self.scrollLanes = tk.Scrollbar(self.frameLanes, orient='vertical', command=self.canvasLanes.yview)
+        self.canvasLanes.config(yscrollcommand=self.scrollLanes.set)
+        self.scrollLanes.pack(side='right', fill='y')
+        self.canvasLanes.pack(expand=1, fill='both')
+
         self.frameSim.grid(row=0, column=0, rowspan=10, padx=15, pady=10, sticky="news")
 
         default_resize(self.frameSim)
@@ -118,6 +236,28 @@ class TMGUI:
         ### Seperate the two sides
         ttk.Separator(master, orient='vertical').grid(column=1, row=0, rowspan=21, sticky='nsew', padx=5)
 
+    def newMachine(self, file):
+        """Create a machine from a specification file, with the options currently checked"""
+        if self.two_tape.get():
+            return two_tape_TM(file,
+                               input=self.textTapeInput.get(),
+                               run_length_tape=self.run_length.get(),
+                               history_budget=self.historyBudget())
+        return turing_machine(file,
+                              input=self.textTapeInput.get(),
+                              bidirectional=self.bidirectional.get(),
+                              run_length_tape=self.run_length.get(),
+                              history_budget=self.historyBudget())
+
+    def historyBudget(self):
+        """The history budget in the entry box, in bytes"""
+        try:
+            return int(float(self.textHistoryBudget.get()) * 2**20)
+        except ValueError:
+            self.textHistoryBudget.delete(0, "end")
+            self.textHistoryBudget.insert(0, str(HISTORY_BUDGET // 2**20))
+            return HISTORY_BUDGET
+
     # Editor Buttons
     def loadTM(self):
         """Load a TM from a specification file into the editor and simulator"""
@@ -130,10 +270,7 @@ class TMGUI:
         self.textEditor.insert(0.0, tmFile.read())
         tmFile.close()
         self.tm = None
-        if self.two_tape.get():
-            self.tm = two_tape_TM(tmFileName, input=self.textTapeInput.get())
-        else:
-            self.tm = turing_machine(tmFileName, input=self.textTapeInput.get(), bidirectional=self.bidirectional.get())
+        self.tm = self.newMachine(tmFileName)
         self.resetTM()
 
     def saveTM(self):
@@ -149,10 +286,7 @@ class TMGUI:
         tmFile.write(self.textEditor.get(0.0, 'end'))
         tmFile.close()
         self.tm = None
-        if self.two_tape.get():
-            self.tm = two_tape_TM(tmFileName, input=self.textTapeInput.get())
-        else:
-            self.tm = turing_machine(tmFileName, input=self.textTapeInput.get(), bidirectional=self.bidirectional.get())
+        self.tm = self.newMachine(tmFileName)
         self.resetTM()
 
     # Simulator Buttons
@@ -169,19 +303,55 @@ class TMGUI:
                 self.textDelay.delete(0, "end")
                 self.textDelay.insert(0, "0.1")
             if delay == 0:  # don't bother with the waiting at all then
+                c = self.tm.config
                 for config in self.tm.run_tm_iter():
                     self.writeOutText(config)
                     c = config
                 self.drawOutMachine(c)
+                if self.tm.outcome == BUDGET_EXHAUSTED:
+                    self.writeOutText(self.budgetMessage())
             else:
                 delay *= 1000  # convert to miliseconds
                 delay = int(delay)
-                count = 0
-                for config in self.tm.run_tm_iter():
-                    count += 1
-                    step = self.tm.step
-                    self._jobs.append(self.main.after(delay * count, self.drawOutMachine, config, step))
-                    self._jobs.append(self.main.after(delay * count, self.writeOutText, config, step))
+                # step the machine as the updates are shown rather than all at once, so that the history budget holds
+                self._jobs.append(self.main.after(delay, self.runStep, self.tm.run_tm_iter(), delay))
+
+    def runStep(self, steps, delay):
+        """Show the next configuration of a continuous run, and schedule the one after it"""
+        self._jobs = []
+        config = next(steps, None)
+        if config == None:
+            if self.tm.outcome == BUDGET_EXHAUSTED:
+                self.writeOutText(self.budgetMessage())
+            return
+        self.drawOutMachine(config)
+        self.writeOutText(config)
+        self._jobs.append(self.main.after(delay, self.runStep, steps, delay))
+
+    def runToBreak(self):
+        """Run the TM at full speed until it hits one of the breakpoints in the breakpoint panel, halts, or uses up its step budget.
+        Only the configuration it stops at is displayed.
+        """
+        if self.tm != None:
+            try:
+                breaks = breakpoints.parse(self.textBreakpoints.get('1.0', 'end'))
+            except ValueError as e:
+                self.writeOutText(str(e) + '\n')
+                return
+            self.stopTM()
+            outcome = self.tm.run(MAX_STEPS, None, breaks)
+            self.drawOutMachine(self.tm.config)
+            self.writeOutText(self.tm.config)
+            if outcome == BREAKPOINT:
+                self.writeOutText("Breakpoint: " + self.tm.breakpoint_reason + '\n')
+            elif outcome == BUDGET_EXHAUSTED:
+                self.writeOutText(self.budgetMessage())
+            elif self.tm.breakpoint_reason:
+                self.writeOutText("Breakpoint on the halting step: " + self.tm.breakpoint_reason + '\n')
+
+    def budgetMessage(self):
+        """The text shown when a run stops because it used up its step budget"""
+        return "Stopped after " + str(MAX_STEPS) + " more steps without halting. Run again to carry on.\n"
 
     def stepTM(self):
         """Step the TM forward once"""
@@ -202,6 +372,7 @@ class TMGUI:
         """Reset the TM to an unrun state"""
         self.lastRunStep = 0
         self.stopTM()
+        self.closeTrace()
         if self.bidirectional.get():
             self.drawFirstTape()
         if self.two_tape.get():
@@ -223,6 +394,212 @@ class TMGUI:
             self.tm.go_back_to_step(self.lastRunStep)
         self._jobs = []
 
+    # Trace Buttons
+    def openTrace(self):
+        """Open a binary trace written by simulate.py for replay.
+        The file is memory mapped, so any step can be shown without loading the whole trace.
+        """
+        traceFileName = filedialog.askopenfilename(
+            initialdir=CWD, title="Select Trace File", filetypes=[("Trace files", "*.tmt"), ("all", "*.*")])
+        if traceFileName == '':
+            return
+        self.stopTM()
+        self.closeTrace()
+        trace = trace_reader(traceFileName)
+        # match the simulator options to the traced machine, in an order the checkboxes allow
+        if trace.two_tape:
+            if not self.bidirectional.get():
+                self.bidirectional.set(True)
+            if not self.two_tape.get():
+                self.two_tape.set(True)
+        else:
+            if self.two_tape.get():
+                self.two_tape.set(False)
+            if self.bidirectional.get() != trace.two_way:
+                self.bidirectional.set(trace.two_way)
+        self.trace = trace
+        self.labelTraceSteps.config(text="of " + str(len(self.trace) - 1))
+        self.showTraceStep(0)
+
+    def closeTrace(self):
+        """Stop replaying the open trace, if any, and go back to showing the machine"""
+        if self.trace != None:
+            self.trace.close()
+            self.trace = None
+            self.labelTraceSteps.config(text="")
+            self.textTraceStep.delete(0, 'end')
+
+    def gotoTraceStep(self, *args):
+        """Show the step of the open trace typed into the step box"""
+        if self.trace != None:
+            try:
+                n = int(self.textTraceStep.get())
+            except ValueError:
+                n = 0
+            self.showTraceStep(min(max(n, 0), len(self.trace) - 1))
+
+    def traceBack(self):
+        """Show the previous step of the open trace"""
+        if self.trace != None:
+            self.showTraceStep(max(self.traceStep - 1, 0))
+
+    def traceForward(self):
+        """Show the next step of the open trace"""
+        if self.trace != None:
+            self.showTraceStep(min(self.traceStep + 1, len(self.trace) - 1))
+
+    def showTraceStep(self, n):
+        """Rebuild step n of the open trace and show it on the canvas and in the text output"""
+        self.traceStep = n
+        self.textTraceStep.delete(0, 'end')
+        self.textTraceStep.insert(0, str(n))
+        config = self.trace.config_at(n)
+        self.drawOutMachine(config, n)
+        self.textSimOut.config(state='normal')
+        self.textSimOut.delete(1.0, 'end')
+        self.textSimOut.config(state='disabled')
+        self.writeConfigText(config, n)
+
+    # Space-Time Buttons
+    def renderSpaceTime(self, zoom=None):
+        """Draw the space-time diagram of the open trace from the step shown on (at most spacetime.TRACE_WINDOW steps),
+        or of the run of the machine up to the step shown.
+        By default the zoom is picked so the whole run fits in the canvas height.
+        """
+        if self.trace != None:
+            histories = [spacetime.history_from_trace(self.trace, i, self.traceStep) for i in range(self.trace.ntapes)]
+        elif self.tm != None:
+            tapes = 2 if self.two_tape.get() else 1
+            histories = [spacetime.history_from_machine(self.tm, i, self.lastRunStep) for i in range(tapes)]
+        else:
+            return
+        self.spaceTimeHistories = histories
+        self.spaceTimeFirst = 0
+        if zoom == None:
+            zoom = spacetime.fit_zoom(histories[0], self.spaceTimeRows())
+        self.drawSpaceTime(zoom)
+
+    def spaceTimeRows(self):
+        """The number of pixel rows the Space-Time canvas shows"""
+        return max(self.canvasSpaceTime.winfo_height(), int(self.canvasSpaceTime.cget('height')))
+
+    def spaceTimePage(self, zoom):
+        """The number of steps between rows, and the number of rows that fit in the canvas, at the given zoom"""
+        if zoom < 0:
+            return (2**-zoom, self.spaceTimeRows())
+        return (1, max(self.spaceTimeRows() // 2**zoom, 1))
+
+    def drawSpaceTime(self, zoom):
+        """Render the rows of the diagram that fit in the canvas, from step self.spaceTimeFirst on, and show them"""
+        n = len(self.spaceTimeHistories[0])
+        (stride, rows) = self.spaceTimePage(zoom)
+        first = max(min(self.spaceTimeFirst, n - rows * stride), 0)
+        self.spaceTimeFirst = first - first % stride
+        self.spaceTimeZoom = zoom
+        self.spaceTimeArray = spacetime.render_side_by_side(
+            self.spaceTimeHistories, zoom, first=self.spaceTimeFirst, rows=rows)
+        png = spacetime.png_bytes(self.spaceTimeArray)
+        self.spaceTimeImage = tk.PhotoImage(data=base64.b64encode(png))
+        self.canvasSpaceTime.delete('all')
+        self.canvasSpaceTime.create_image(0, 0, anchor='nw', image=self.spaceTimeImage)
+        self.canvasSpaceTime.config(scrollregion=(0, 0, self.spaceTimeArray.shape[1], self.spaceTimeArray.shape[0]))
+        last = min(self.spaceTimeFirst + rows * stride, n)
+        self.scrollSpaceTimeY.set(float(self.spaceTimeFirst) / n, float(last) / n)
+        if zoom < 0:
+            self.labelZoom.config(text="1 row = " + str(2**-zoom) + " steps")
+        else:
+            self.labelZoom.config(text="1 step = " + str(2**zoom) + " px")
+
+    def scrollSpaceTime(self, action, amount, unit=None):
+        """Callback for the vertical scrollbar of the Space-Time canvas: move to other steps of the run and draw them"""
+        if self.spaceTimeZoom == None:
+            return
+        (stride, rows) = self.spaceTimePage(self.spaceTimeZoom)
+        if action == 'moveto':
+            self.spaceTimeFirst = int(float(amount) * len(self.spaceTimeHistories[0]))
+        else:
+            self.spaceTimeFirst += int(amount) * stride * (rows if unit == 'pages' else 1)
+        self.drawSpaceTime(self.spaceTimeZoom)
+
+    def zoomInSpaceTime(self):
+        """Show fewer steps per row, or magnify the cells once every step has its own row"""
+        if self.spaceTimeZoom != None:
+            self.drawSpaceTime(self.spaceTimeZoom + 1)
+
+    def zoomOutSpaceTime(self):
+        """Show more steps per row"""
+        if self.spaceTimeZoom != None:
+            self.drawSpaceTime(self.spaceTimeZoom - 1)
+
+    def exportSpaceTime(self):
+        """Save the space-time diagram as it is currently shown to a PNG file"""
+        if self.spaceTimeImage == None:
+            return
+        pngFileName = filedialog.asksaveasfilename(
+            initialdir=CWD,
+            title="Select save directory",
+            filetypes=[("PNG files", "*.png"), ("all", "*.*")],
+            defaultextension=".png")
+        if pngFileName == '':
+            return
+        spacetime.save_png(self.spaceTimeArray, pngFileName)
+
+    def setHistoryBudget(self, *args):
+        """Callback for when the history budget is changed. The machine thins its history at once if it is over"""
+        if self.tm != None:
+            self.tm.set_history_budget(self.historyBudget())
+            self.showMemory()
+
+    # Lanes Buttons
+    def resetLanes(self):
+        """Make a lane for each line of the lane inputs, all sharing the transition table of the loaded machine, and draw them"""
+        if self.tm == None:
+            return
+        self.stopLanes()
+        inputs = self.textLaneInputs.get('1.0', 'end').splitlines()
+        while len(inputs) > 0 and inputs[-1].strip() == '':
+            inputs.pop()
+        self.lanes = machine_lanes(self.tm, [string.strip() for string in inputs])
+        self.drawLaneBoxes()
+        for i in range(len(self.lanes)):
+            self.drawLane(i)
+
+    def runLanes(self):
+        """Run all the lanes together, one step per lane each tick of the delay"""
+        if self.lanes == None or not self.lanes.running():
+            self.resetLanes()
+        if self.lanes == None:
+            return
+        self.stopLanes()
+        self.tickLanes()
+
+    def stepLanes(self):
+        """Step every lane forward once"""
+        if self.lanes == None:
+            self.resetLanes()
+        if self.lanes == None:
+            return
+        for i in self.lanes.tick():
+            self.drawLane(i)
+
+    def stopLanes(self):
+        """Stop the continuous run of the lanes"""
+        if self._laneJob != None:
+            self.main.after_cancel(self._laneJob)
+        self._laneJob = None
+
+    def tickLanes(self):
+        """Advance the lanes by one step, redraw the ones that changed, and schedule the next tick while any is running"""
+        self._laneJob = None
+        for i in self.lanes.tick():
+            self.drawLane(i)
+        if self.lanes.running():
+            try:
+                delay = int(float(self.textDelay.get()) * 1000)
+            except ValueError:
+                delay = 100
+            self._laneJob = self.main.after(max(delay, 1), self.tickLanes)
+
     # Callbacks
     def setTape(self, *args):
         """Callback for when tape input is changed.
@@ -250,6 +627,14 @@ class TMGUI:
         else:
             self.checkbox2Tape.configure(state='disabled')
 
+    def setRunLength(self, *args):
+        """Callback for when the run-length tape option is changed.
+        Inform the TM and reset the run.
+        """
+        if self.tm != None:
+            self.tm.set_run_length_tape(self.run_length.get())
+            self.resetTM()
+
     def setTwoTape(self, *args):
         """Callback for when the two tape option is changed.
         Inform the TM, reset the run, and disable the other checkbox
@@ -257,10 +642,7 @@ class TMGUI:
         if self.tm != None:
             file = self.tm.file
             self.tm = None
-            if self.two_tape.get():
-                self.tm = two_tape_TM(file, input=self.textTapeInput.get())
-            else:
-                self.tm = turing_machine(file, input=self.textTapeInput.get(), bidirectional=self.bidirectional.get())
+            self.tm = self.newMachine(file)
             self.resetTM()
         else:
             if self.two_tape.get():
@@ -315,6 +697,7 @@ class TMGUI:
 
         self.canvasSimOut.create_text(125, 100, text=state_text, font="Times 20", tag='text')
         self.canvasSimOut.create_text(725, 100, text="Step: " + str(step), font="Times 20", tag='text')
+        self.showMemory()
         starty = 150
         if not self.two_tape.get():
             self.canvasSimOut.delete('twotape')
@@ -348,15 +731,85 @@ class TMGUI:
                     text2 = tape2[position2 + j] if tape2[position2 + j] != " " else ""
                     self.canvasSimOut.create_text(50 * j + 27, starty + 175, text=text2, font="Times 20", tag='text')
 
+    def laneTapes(self):
+        """The number of tapes each lane has"""
+        if len(self.lanes) > 0 and isinstance(self.lanes[0], two_tape_TM):
+            return 2
+        return 1
+
+    def laneHeight(self):
+        """The height on the canvas of one lane, which has a row of cells per tape"""
+        return 30 + 40 * self.laneTapes()
+
+    def drawLaneBoxes(self):
+        """Helper function to draw the cells of every lane on the lanes canvas. They never change, so they are only drawn once"""
+        self.canvasLanes.delete('all')
+        height = self.laneHeight()
+        tapes = self.laneTapes()
+        for n in range(len(self.lanes)):
+            starty = n * height + 25
+            for t in range(tapes):
+                y = starty + 40 * t
+                for i in range(17):
+                    if i != 8:
+                        self.canvasLanes.create_rectangle(40 * i + 130, y, 40 * i + 168, y + 38, fill="")
+                # draw highlighted square last to make sure sides are properly colored
+                self.canvasLanes.create_rectangle(8 * 40 + 130, y, 8 * 40 + 168, y + 38, fill="white", outline="red")
+        self.canvasLanes.config(scrollregion=(0, 0, 832, len(self.lanes) * height + 10))
+
+    def drawLane(self, n):
+        """Draw the current configuration of one lane. Only the items of that lane are redrawn"""
+        lane = self.lanes[n]
+        config = lane.config
+        tag = 'lane' + str(n)
+        self.canvasLanes.delete(tag)
+        starty = n * self.laneHeight() + 25
+        state = config[4]
+        if state < 0:
+            state_text = {-1: 'Accept', -2: 'Reject'}.get(state, 'Halt')
+        else:
+            state_text = "State: " + str(state)
+        self.canvasLanes.create_text(
+            10, starty - 12, anchor='w', text=str(n + 1) + ": " + lane.inputstring, font="Times 12", tag=tag)
+        self.canvasLanes.create_text(
+            10, starty + 12, anchor='w', text=state_text, font="Times 12 bold" if state < 0 else "Times 12", tag=tag)
+        self.canvasLanes.create_text(
+            10, starty + 32, anchor='w', text="Step: " + str(lane.step), font="Times 12", tag=tag)
+        if isinstance(lane, two_tape_TM):
+            rows = [(config[0][0], config[3][0]), (config[0][1], config[3][1])]
+        else:
+            rows = [(config[0], config[3])]
+        for t in range(len(rows)):
+            (tape, position) = (rows[t][0], rows[t][1] - 8)
+            y = starty + 40 * t + 19
+            for j in range(17):
+                if (position + j) < 0 or (position + j) >= len(tape):
+                    continue
+                text = tape[position + j] if tape[position + j] != " " else ""
+                if text != "":
+                    self.canvasLanes.create_text(40 * j + 149, y, text=text, font="Times 16", tag=tag)
+
+    def showMemory(self):
+        """Show how much memory the history and tapes of the machine are using"""
+        if self.tm != None:
+            self.labelMemory.config(text=memory_report(self.tm))
+        else:
+            self.labelMemory.config(text="")
+
     def writeOutText(self, config, step=None):
         """Write out the given configuration of the machine in the text output."""
         if step == None:
             step = self.tm.step
         self.lastRunStep = step
+        self.writeConfigText(config, step)
+
+    def writeConfigText(self, config, step):
+        """Write out the given configuration in the text output, without touching the state of the run."""
         self.textSimOut.config(state='normal')
         if (type(config) != str):
+            machine = two_tape_TM if self.two_tape.get() else turing_machine
             self.textSimOut.insert('end', "Step: " + str(step) + '\n')
-            self.textSimOut.insert('end', self.tm.format_config(config))
+            self.textSimOut.insert('end', machine.format_config(config))
             if config[4] < 0:
                 if config[4] == -1:
                     result = 'Accept'
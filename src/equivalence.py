@@ -0,0 +1,230 @@
+"""Check that two Turing Machines accept the same language, up to a given input length.
+
+Every string over the input alphabet up to length n is run on both machines across a pool of
+worker processes. Counterexamples are reported in shortlex order as soon as they are found.
+
+Usage:
+python equivalence.py first.tm second.tm -n 8 [--two-tape] [--one-way] [--alphabet ab] [--max-steps 10000]
+"""
+import argparse, itertools, multiprocessing, sys, time
+
+from turing_machines import turing_machine, two_tape_TM, MAX_STEPS, BUDGET_EXHAUSTED
+
+CHUNK_SIZE = 4096  # roughly how many strings each task sent to a worker contains
+
+OUTCOMES = {-1: 'Accept', -2: 'Reject', -3: 'Halt', None: 'Undecided'}
+
+_machines = None  # per-worker machines, filled in by _init_worker()
+
+
+def read_tables(files, two_tape=False):
+    """Read the transition tables of the given configuration files"""
+    if two_tape:
+        return [two_tape_TM.read_transition_table(f) for f in files]
+    return [turing_machine.read_transition_table(f) for f in files]
+
+
+def infer_alphabet(tables, two_tape=False):
+    """Guess the input alphabet of one or more machines.
+
+    The input alphabet is taken to be every non-blank symbol that the start state (state 0) knows how to read
+    on the input tape. Tape-only symbols such as markers are usually introduced in later states, so they are left out.
+    Returns:
+    a sorted string of the symbols
+    """
+    alphabet = set()
+    for table in tables:
+        for (state, sym) in table:
+            if two_tape:
+                sym = sym[0]
+            if state == 0 and sym != ' ':
+                alphabet.add(sym)
+    return ''.join(sorted(alphabet))
+
+
+def count_strings(alphabet, n):
+    """The number of strings over the alphabet with length at most n"""
+    k = len(alphabet)
+    return sum(k**length for length in range(n + 1))
+
+
+def enumerate_strings(alphabet, n):
+    """A generator of every string over the alphabet with length at most n, in shortlex order"""
+    for length in range(n + 1):
+        for letters in itertools.product(alphabet, repeat=length):
+            yield ''.join(letters)
+
+
+def make_tasks(alphabet, n, chunk_size=CHUNK_SIZE):
+    """A generator of the work units for the pool, in shortlex order.
+
+    Each task is a (prefix, suffix_length) pair standing for every string made of the prefix followed by
+    suffix_length symbols. Tasks stay tiny no matter how many strings they stand for, so millions of inputs
+    never have to be held in memory at once.
+    """
+    k = len(alphabet)
+    for length in range(n + 1):
+        suffix = length
+        if k > 1:
+            while suffix > 0 and k**suffix > chunk_size:
+                suffix -= 1
+        for letters in itertools.product(alphabet, repeat=length - suffix):
+            yield (''.join(letters), suffix)
+
+
+def final_state(tm, string, max_steps=MAX_STEPS):
+    """Run a machine kept without history on the string, with the simulator's own run().
+
+    Args:
+    tm -- a turing_machine or two_tape_TM, reused from string to string
+    string -- the input
+    max_steps -- the step budget, or None for no limit. DEFAULT: MAX_STEPS
+    Returns:
+    the final state (a negative integer), or None if the machine did not halt within max_steps
+    """
+    tm.set_input_string(string)
+    if tm.run(max_steps) == BUDGET_EXHAUSTED:
+        return None
+    return tm.config[4]
+
+
+def make_machines(files, two_tape=False, bidirectional=True):
+    """Build the two machines to compare, without history, each reading its transition table once"""
+    tables = read_tables(files, two_tape)
+    if two_tape:
+        return [two_tape_TM(f, keep_history=False, transitions=t) for (f, t) in zip(files, tables)]
+    return [turing_machine(f, bidirectional=bidirectional, keep_history=False, transitions=t)
+            for (f, t) in zip(files, tables)]
+
+
+def _init_worker(files, two_tape, bidirectional):
+    """Pool initializer: build the machines once per worker process"""
+    global _machines
+    _machines = make_machines(files, two_tape, bidirectional)
+
+
+def _check_task(args):
+    """Run both machines on every string of one task.
+
+    Returns:
+    a tuple (checked, undecided, mismatches) where mismatches is a list of (string, outcome1, outcome2)
+    """
+    (prefix, suffix, alphabet, max_steps) = args
+    (tm1, tm2) = _machines
+    checked = 0
+    undecided = 0
+    mismatches = []
+    for letters in itertools.product(alphabet, repeat=suffix):
+        string = prefix + ''.join(letters)
+        out1 = final_state(tm1, string, max_steps)
+        out2 = final_state(tm2, string, max_steps)
+        checked += 1
+        if out1 is None or out2 is None:
+            undecided += 1
+        elif (out1 == -1) != (out2 == -1):
+            mismatches.append((string, out1, out2))
+    return (checked, undecided, mismatches)
+
+
+class equivalence_check:
+    """Compare the languages accepted by two machines on every string up to a given length.
+
+    Iterate over counterexamples() to run the check; the counters below are updated as it goes.
+    """
+
+    def __init__(self, file1, file2, n, alphabet=None, two_tape=False, bidirectional=True, max_steps=MAX_STEPS,
+                 processes=None):
+        """ Set up a check
+
+        Args:
+        file1, file2 -- the names of the two configuration files
+        n -- the maximum input length
+        alphabet -- the input symbols. DEFAULT: inferred from both machines, see infer_alphabet()
+        two_tape -- whether the files describe two tape machines. DEFAULT: False
+        bidirectional -- whether single tape machines use a 2 way tape. DEFAULT: True
+        max_steps -- the step budget for each run, or None for no limit. Runs exceeding it are counted as undecided.
+                     DEFAULT: MAX_STEPS
+        processes -- the number of worker processes. DEFAULT: one per CPU
+        """
+        self.files = (file1, file2)
+        self.n = n
+        self.two_tape = two_tape
+        self.bidirectional = bidirectional
+        self.max_steps = max_steps
+        self.processes = processes
+        if alphabet is None:
+            alphabet = infer_alphabet(read_tables(self.files, two_tape), two_tape)
+        self.alphabet = alphabet
+        self.total = count_strings(alphabet, n)
+        self.checked = 0
+        self.undecided = 0
+        self.found = 0
+        self.elapsed = 0.0
+
+    def counterexamples(self, limit=None):
+        """A generator of the strings on which the machines disagree, in shortlex order.
+
+        Args:
+        limit -- stop after this many counterexamples. DEFAULT: None, check every string
+        Yields:
+        tuples (string, outcome1, outcome2) where the outcomes are final states as in final_state()
+        """
+        tasks = ((prefix, suffix, self.alphabet, self.max_steps)
+                 for (prefix, suffix) in make_tasks(self.alphabet, self.n))
+        pool = multiprocessing.Pool(self.processes, _init_worker, (self.files, self.two_tape, self.bidirectional))
+        start = time.time()
+        try:
+            for (checked, undecided, mismatches) in pool.imap(_check_task, tasks):
+                self.checked += checked
+                self.undecided += undecided
+                self.elapsed = time.time() - start
+                for mismatch in mismatches:
+                    self.found += 1
+                    yield mismatch
+                    if limit is not None and self.found >= limit:
+                        return
+        finally:
+            self.elapsed = time.time() - start
+            pool.terminate()
+            pool.join()
+
+    def throughput(self):
+        """The number of strings checked per second so far"""
+        if self.elapsed == 0:
+            return 0.0
+        return self.checked / self.elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check two Turing Machines accept the same strings up to length n")
+    parser.add_argument('file1', help="the first .tm file")
+    parser.add_argument('file2', help="the second .tm file")
+    parser.add_argument('-n', type=int, default=8, help="the maximum input length (default: 8)")
+    parser.add_argument('--alphabet', default=None, help="the input symbols (default: inferred from state 0)")
+    parser.add_argument('--two-tape', action='store_true', help="the files describe two tape machines")
+    parser.add_argument('--one-way', action='store_true', help="use a one way infinite tape")
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS, help="step budget for each run (0: no limit)")
+    parser.add_argument('--processes', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--limit', type=int, default=10, help="stop after this many counterexamples (0: no limit)")
+    args = parser.parse_args(argv)
+
+    check = equivalence_check(args.file1, args.file2, args.n, alphabet=args.alphabet, two_tape=args.two_tape,
+                              bidirectional=not args.one_way, max_steps=args.max_steps or None,
+                              processes=args.processes)
+    print("Alphabet: " + check.alphabet)
+    print("Checking " + str(check.total) + " strings of length at most " + str(args.n))
+    for (string, out1, out2) in check.counterexamples(args.limit or None):
+        print("Counterexample: '" + string + "' " + OUTCOMES.get(out1, 'Halt') + " / " + OUTCOMES.get(out2, 'Halt'))
+        sys.stdout.flush()
+    print(str(check.checked) + " strings checked in " + "%.2f" % check.elapsed + "s (" + "%.0f" % check.throughput() +
+          " strings/s)")
+    if check.undecided:
+        print(str(check.undecided) + " strings undecided within " + str(args.max_steps) + " steps")
+    if check.found == 0:
+        print("No counterexamples found")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
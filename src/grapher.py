@@ -1,14 +1,17 @@
 try:  # python 3: default
     import tkinter as tk
-    from tkinter import filedialog
+    from tkinter import filedialog, messagebox
 except ImportError:  # python 2
     import Tkinter as tk
-    import tkFileDialog as filedialog
+    import tkFileDialog as filedialog, tkMessageBox as messagebox
 
-import os, graphviz
+import collections, os, graphviz
+
+import heatmap
+from turing_machines import turing_machine, two_tape_TM
 
 WIDTH = 250
-HEIGHT = 75
+HEIGHT = 200
 DIMENSIONS = str(WIDTH) + "x" + str(HEIGHT)
 CWD = os.getcwd()
 
@@ -25,6 +28,24 @@ class GrapherGUI():
         self.buttonGraph = tk.Button(self.main, width=10, text="Graph", command=self.graphTM)
         self.buttonGraph.pack(pady=5, expand=1)
 
+        ### HEATMAP: color the graph by how often a run takes each transition
+        self.frameHeat = tk.Frame(self.main)
+        self.frameHeat.pack(pady=5, expand=1)
+        tk.Label(self.frameHeat, text="Input:").grid(row=0, column=0, sticky=tk.E)
+        self.entryInput = tk.Entry(self.frameHeat, width=16)
+        self.entryInput.grid(row=0, column=1)
+        tk.Label(self.frameHeat, text="Path to step:").grid(row=1, column=0, sticky=tk.E)
+        self.entryStep = tk.Entry(self.frameHeat, width=16)
+        self.entryStep.grid(row=1, column=1)
+        self.oneWay = tk.BooleanVar()
+        self.checkOneWay = tk.Checkbutton(self.frameHeat, text="One-way tape", variable=self.oneWay)
+        self.checkOneWay.grid(row=2, column=0, columnspan=2)
+        self.twoTape = tk.BooleanVar()
+        self.checkTwoTape = tk.Checkbutton(self.frameHeat, text="Two Tape", variable=self.twoTape)
+        self.checkTwoTape.grid(row=3, column=0, columnspan=2)
+        self.buttonHeat = tk.Button(self.frameHeat, width=10, text="Heatmap", command=self.heatmapTM)
+        self.buttonHeat.grid(row=4, column=0, columnspan=2, pady=5)
+
     def graphTM(self):
         """Get a TM specification file from the user, and graph it"""
         tmFileName = filedialog.askopenfilename(
@@ -35,28 +56,91 @@ class GrapherGUI():
         file = os.path.basename(tmFileName)[:-3]
         GrapherGUI.generate_graph(tmgraphdict, file)
 
+    def heatmapTM(self):
+        """Get a TM specification file from the user, run it on the input, and graph it colored by how often each transition was taken"""
+        tmFileName = filedialog.askopenfilename(
+            initialdir=CWD, title="Select TM File", filetypes=[("TM files", "*.tm"), ("all", "*.*")])
+        if tmFileName == '':
+            return
+        try:
+            step = int(self.entryStep.get()) if self.entryStep.get().strip() else None
+        except ValueError:
+            step = None
+        two_tape = GrapherGUI.looks_two_tape(turing_machine.read_transition_table(tmFileName))
+        if two_tape != self.twoTape.get():
+            messagebox.showerror("Heatmap", os.path.basename(tmFileName) + " looks like a " +
+                                 ("two" if two_tape else "one") + " tape machine. " +
+                                 ("Check" if two_tape else "Uncheck") + " Two Tape to run it.")
+            return
+        if two_tape:
+            tm = two_tape_TM(tmFileName, input=self.entryInput.get(), keep_history=False)
+        else:
+            tm = turing_machine(
+                tmFileName, input=self.entryInput.get(), bidirectional=not self.oneWay.get(), keep_history=False)
+        (counts, path, current) = heatmap.count_transitions(tm, step=step)
+        tmgraphdict = GrapherGUI.make_state_dict(tmFileName)
+        file = os.path.basename(tmFileName)[:-3] + '_heatmap'
+        GrapherGUI.generate_graph(tmgraphdict, file, heatmap.edge_counts(counts, tm.next_state_dict), path, current)
+
+    @staticmethod
+    def looks_two_tape(table):
+        """Whether a table read as a one tape machine is really a two tape one, with every symbol written c:c'. Used to catch a wrong Two Tape setting"""
+        return len(table) > 0 and all(':' in key[1] for key in table)
+
     @staticmethod
-    def generate_graph(dict, file="turing_machine"):
-        """Take the dictionary from make_state_dict(), turn it into a Digraph object and render"""
+    def generate_graph(dict, file="turing_machine", counts=None, path=None, current=None):
+        """Take the dictionary from make_state_dict(), turn it into a Digraph object and render
+
+        Args:
+        dict -- the dictionary from make_state_dict()
+        file -- the name of the image, without extension. DEFAULT: "turing_machine"
+        counts -- how many times a run took each edge, as from heatmap.edge_counts(). Edges and states are then colored and weighted by it, so hot loops stand out. DEFAULT: None
+        path -- a set of (q,q') edges to highlight, as from heatmap.count_transitions(). DEFAULT: None
+        current -- a state to highlight, such as the state at the end of the path. DEFAULT: None
+        """
         d = dict
         g = graphviz.Digraph(graph_attr={"dpi": "300"})
+        if counts is not None:
+            total = sum(counts.values())
+            most = max(counts.values()) if counts else 0
+            visits = collections.Counter()  # steps spent in each state
+            for (key, hits) in counts.items():
+                visits[key[0]] += hits
+            busiest = max(visits.values()) if visits else 0
+            for state in set(key[0] for key in d):
+                if visits[state] > 0:
+                    g.node(str(state), style="filled", fillcolor=heatmap.heat_color(visits[state], busiest))
+        if current is not None:
+            g.node(GrapherGUI.state_name(current), color="blue", peripheries="2", penwidth="2")
         for key in d:
             state = str(key[0])
-            newstate = str(key[1])
-            if newstate == '-1':
-                newstate = 'Accept'
-            if newstate == '-2':
-                newstate = 'Reject'
-            if newstate == '-3':
-                newstate = 'Halt'
+            newstate = GrapherGUI.state_name(key[1])
             val = d[key]
             sym = str(val[0])
             newsym = str(val[1])
             direction = val[2]
             comma = ', ' if newsym else ''
-            g.edge(state, newstate, label="< " + sym + " &#8594; " + newsym + comma + direction + ">")  #use HTML labels
+            attrs = {}
+            heat = ''
+            if counts is not None:
+                hits = counts.get(key, 0)
+                if hits > 0:
+                    attrs = {"color": heatmap.heat_color(hits, most), "penwidth": "%.2f" % (1 + 4.0 * hits / most)}
+                    heat = "<br/>" + str(hits) + " (" + str(round(100.0 * hits / total, 1)) + "%)"
+                else:
+                    attrs = {"color": "gray", "fontcolor": "gray"}
+            if path is not None and key in path:
+                attrs["color"] = "blue"
+                attrs["style"] = "bold"
+            g.edge(state, newstate, label="< " + sym + " &#8594; " + newsym + comma + direction + heat + ">",
+                   **attrs)  #use HTML labels
         g.render(file, directory='img', format="png", cleanup=True, view=True)
 
+    @staticmethod
+    def state_name(state):
+        """The node name of a state, which spells out the halting states"""
+        return {-1: 'Accept', -2: 'Reject', -3: 'Halt'}.get(state, str(state))
+
     @staticmethod
     def make_state_dict(filename):
         """Turn a configuration file into a state-state dictionary. Used in generating images of the TM.
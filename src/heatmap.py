@@ -0,0 +1,48 @@
+"""Count how often a run of a Turing Machine takes each transition, for the heatmap in grapher.py.
+
+Kept apart from the grapher, which opens its window as soon as it is imported, so that these can be used on their own.
+"""
+import collections, math
+
+from turing_machines import MAX_STEPS
+
+
+def count_transitions(tm, max_steps=MAX_STEPS, step=None):
+    """Run a machine from the start and count how many times it takes each transition, in one pass of run()
+
+    Args:
+    tm -- the turing_machine or two_tape_TM
+    max_steps -- the most steps to run, or None for no limit. DEFAULT: MAX_STEPS
+    step -- a step to note the path up to. The run pauses there and carries on with the same counts. DEFAULT: None
+    Returns:
+    a tuple (C,P,q) where C is a Counter with key-value pairs (q,c):n, keyed like the transition table of the machine, P is the set of (q,q') edges taken up to the given step and q is the state at that step (both None without a step)
+    """
+    counts = collections.Counter()
+    path = current = None
+    tm.reset_config()
+    if step is not None:
+        tm.run(step if max_steps is None else min(step, max_steps), counts=counts)
+        path = set(edge_counts(counts, tm.next_state_dict))
+        current = tm.config[4]
+        if max_steps is not None:
+            max_steps -= tm.step
+    tm.run(max_steps, counts=counts)
+    return (counts, path, current)
+
+
+def edge_counts(counts, table):
+    """Add up transition counts (see count_transitions()) for each edge of the graph
+
+    Returns:
+    a Counter with key-value pairs (q,q'):n, keyed like the dictionary from GrapherGUI.make_state_dict() in grapher.py
+    """
+    edges = collections.Counter()
+    for (key, hits) in counts.items():
+        edges[(key[0], table[key][0])] += hits
+    return edges
+
+
+def heat_color(hits, most):
+    """A graphviz color for a hit count, from pale yellow for rarely taken to red for the most taken"""
+    heat = math.log(1 + hits) / math.log(1 + most) if most > 0 else 0.0
+    return "%.3f %.3f %.3f" % (0.17 * (1 - heat), 0.3 + 0.7 * heat, 1.0)
@@ -0,0 +1,207 @@
+"""Run one single tape Turing Machine on many inputs at once, in lockstep, with NumPy.
+
+All the tapes are stacked into one 2-D uint8 array of symbol codes, with a vector of head positions and a vector of
+states. Each iteration advances every lane that is still running by one step, through fancy indexing into a dense
+transition table built from read_transition_table(). Lanes that halt are dropped from the active set, so the work per
+iteration shrinks as the batch finishes. The results match those of turing_machine.run() on each input.
+
+Usage:
+python lockstep.py machine.tm inputs.txt [--one-way] [--max-steps N]
+where inputs.txt has one input per line. Prints the outcome, the number of steps and the tape of each input.
+"""
+import argparse
+import numpy as np
+
+from turing_machines import turing_machine, outcome_of, MAX_STEPS, BUDGET_EXHAUSTED
+
+TAPE_LENGTH = 20000  # the same finite tape the simulator uses
+MARGIN = 64  # blank cells allocated at first on each side of the inputs. The tapes grow as the heads need
+
+
+class dense_table:
+    """A transition table of a single tape machine as flat NumPy arrays, indexed by row * len(symbols) + symbol code
+
+    Attributes:
+    symbols -- the tape symbols, blank first. Tapes hold indices into this list
+    states -- states[row] is the state of each row of the table
+    next_row -- the row of the next state, or the (negative) halting state itself
+    write -- the code of the symbol written
+    move -- the head movement, -1, 0 or 1
+    Missing transitions reject without writing or moving, as in the simulator.
+    """
+
+    def __init__(self, table, alphabet=''):
+        """ Build a dense table
+
+        Args:
+        table -- a transition table from turing_machine.read_transition_table()
+        alphabet -- further symbols that may turn up on the tapes, such as the symbols of the inputs. DEFAULT: ''
+        """
+        symbols = set(alphabet)
+        states = set([0])
+        for ((state, sym), (newstate, newsym, direction)) in table.items():
+            if isinstance(sym, tuple):
+                raise ValueError("Only single tape machines can be run in lockstep")
+            symbols.update((sym, newsym))
+            states.add(state)
+            if newstate >= 0:
+                states.add(newstate)
+        symbols.discard(' ')
+        self.symbols = [' '] + sorted(symbols)
+        if len(self.symbols) > 256:
+            raise ValueError("Too many tape symbols to run in lockstep")
+        self.codes = dict((sym, i) for (i, sym) in enumerate(self.symbols))
+        self.states = sorted(states)
+        self.rows = dict((state, i) for (i, state) in enumerate(self.states))
+
+        k = len(self.symbols)
+        size = len(self.states) * k
+        self.next_row = np.full(size, -2, dtype=np.int32)
+        self.write = np.tile(np.arange(k, dtype=np.uint8), len(self.states))
+        self.move = np.zeros(size, dtype=np.int8)
+        for ((state, sym), (newstate, newsym, direction)) in table.items():
+            i = self.rows[state] * k + self.codes[sym]
+            self.next_row[i] = self.rows[newstate] if newstate >= 0 else newstate
+            self.write[i] = self.codes[newsym]
+            self.move[i] = direction
+
+    def encoder(self):
+        """A lookup array from byte values to symbol codes, for turning inputs into tape rows"""
+        lookup = np.zeros(256, dtype=np.uint8)
+        for (sym, code) in self.codes.items():
+            if ord(sym) < 256:
+                lookup[ord(sym)] = code
+        return lookup
+
+
+class batch_result:
+    """The outcome of running a machine on a batch of inputs with run_batch()
+
+    Attributes:
+    inputs -- the inputs, in order
+    states -- the state each lane ended in (its current state if it ran out of steps)
+    steps -- the number of steps each lane took
+    finished -- whether each lane halted within the step budget
+    """
+
+    def __init__(self, inputs, states, steps, finished, tapes, starts, ends, origin, symbols):
+        self.inputs = inputs
+        self.states = states
+        self.steps = steps
+        self.finished = finished
+        self._tapes = tapes
+        self._starts = starts
+        self._ends = ends
+        self._origin = origin
+        self._symbols = symbols
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def outcome(self, i):
+        """The outcome of lane i, as turing_machine.outcome would have it"""
+        if not self.finished[i]:
+            return BUDGET_EXHAUSTED
+        return outcome_of(int(self.states[i]))
+
+    def tape(self, i):
+        """The used part of the tape of lane i, as a string, like ''.join(config[0][start:end + 1]) for a turing_machine"""
+        row = self._tapes[i, self._starts[i]:self._ends[i] + 1]
+        return ''.join([self._symbols[code] for code in row])
+
+    def start(self, i):
+        """The start of the used part of the tape of lane i, counted from the first input cell"""
+        return int(self._starts[i]) - self._origin
+
+    def end(self, i):
+        """The end of the used part of the tape of lane i, counted from the first input cell"""
+        return int(self._ends[i]) - self._origin
+
+
+def run_batch(table, inputs, bidirectional=True, max_steps=MAX_STEPS):
+    """Run a single tape machine on every input, in lockstep.
+
+    Args:
+    table -- a transition table from turing_machine.read_transition_table(), or a dense_table made from one
+    inputs -- a list of input strings
+    bidirectional -- whether the tape is 2 way. DEFAULT: True
+    max_steps -- the most steps any lane may take, or None for no limit. DEFAULT: MAX_STEPS
+    Returns:
+    a batch_result
+    """
+    if not isinstance(table, dense_table):
+        table = dense_table(table, ''.join(inputs))
+    n = len(inputs)
+    k = len(table.symbols)
+    longest = max([len(string) for string in inputs] + [0])
+
+    # tape columns are allocated lazily: column c holds cell c - origin, counted from the first input cell
+    left = MARGIN if bidirectional else 0
+    width = left + longest + MARGIN
+    tapes = np.zeros((n, width), dtype=np.uint8)
+    lookup = table.encoder()
+    for i in range(n):
+        if len(inputs[i]) > 0:
+            tapes[i, left:left + len(inputs[i])] = lookup[np.frombuffer(inputs[i].encode('latin-1'), dtype=np.uint8)]
+    origin = left
+    (low, high) = (-TAPE_LENGTH // 2, TAPE_LENGTH // 2 - 1) if bidirectional else (0, TAPE_LENGTH - 1)
+
+    heads = np.full(n, origin, dtype=np.int64)
+    rows = np.zeros(n, dtype=np.int32)
+    steps = np.zeros(n, dtype=np.int64)
+    starts = np.full(n, origin, dtype=np.int64)
+    ends = origin + np.array([len(string) for string in inputs], dtype=np.int64) - 1
+    active = np.arange(n)
+    taken = 0
+    while len(active) > 0 and (max_steps is None or taken < max_steps):
+        head = heads[active]
+        cells = active * width + head
+        flat = tapes.reshape(-1)
+        key = rows[active] * k + flat[cells]
+        written = table.write[key]
+        flat[cells] = written
+        nonblank = written != 0
+        starts[active] = np.where(nonblank & (head < starts[active]), head, starts[active])
+        ends[active] = np.where(nonblank & (head > ends[active]), head, ends[active])
+        head = np.clip(head + table.move[key], origin + low, origin + high)
+        taken += 1
+
+        if head.min() < 0 or head.max() >= width:  # a head ran off the allocated columns, so widen the tapes
+            grow_left = width if head.min() < 0 else 0
+            grow_right = width if head.max() >= width else 0
+            tapes = np.pad(tapes, ((0, 0), (grow_left, grow_right)))
+            (origin, width) = (origin + grow_left, width + grow_left + grow_right)
+            (heads, starts, ends, head) = (heads + grow_left, starts + grow_left, ends + grow_left, head + grow_left)
+        heads[active] = head
+        row = table.next_row[key]
+        rows[active] = row
+        halted = row < 0
+        if halted.any():
+            steps[active[halted]] = taken
+            active = active[~halted]
+    steps[active] = taken
+
+    finished = np.ones(n, dtype=bool)
+    finished[active] = False
+    states = np.where(rows < 0, rows, np.array(table.states, dtype=np.int64)[np.maximum(rows, 0)])
+    return batch_result(inputs, states, steps, finished, tapes, starts, ends, origin, table.symbols)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Turing Machine on many inputs at once")
+    parser.add_argument('file', help="the .tm file")
+    parser.add_argument('inputs', help="a file with one input per line")
+    parser.add_argument('--one-way', action='store_true', help="use a one way infinite tape")
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS, help="step budget for each input (0: no limit)")
+    args = parser.parse_args(argv)
+
+    f = open(args.inputs, 'r')
+    inputs = f.read().splitlines()
+    f.close()
+    result = run_batch(turing_machine.read_transition_table(args.file), inputs, not args.one_way, args.max_steps or None)
+    for i in range(len(result)):
+        print(result.outcome(i) + '\t' + str(result.steps[i]) + '\t' + result.tape(i))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""A run-length encoded tape, for machines that fill long stretches of the tape with the same symbol.
+
+An rle_tape behaves like the list of cells the simulator normally uses for a tape (indexing, assignment, slicing,
+len, iteration), but only stores the maximal runs of equal symbols. The runs are kept as two parallel sorted lists of
+run starts and run symbols, searched with bisect, so reading a cell is O(log r) for r runs and a copy is O(r) no matter
+how long the tape is. Writing a cell that changes its symbol is O(r): the runs around it are split or joined by
+splicing the two lists, which is a memory move of the entries after it rather than a walk over them in Python.
+Writing the symbol a cell already holds, the most common write, is O(log r).
+
+run() steps the machine on the rle_tape itself, so a run never expands the tape to its full length. Each step costs
+more than on a plain list, which is the price of the memory saved.
+"""
+import bisect
+
+
+class rle_tape:
+    """A fixed length tape stored as maximal runs of equal symbols"""
+
+    def __init__(self, cells=(), length=None, blank=' '):
+        """ Build a tape
+
+        Args:
+        cells -- the initial contents of the tape, as any iterable of symbols. DEFAULT: empty
+        length -- the length of the tape. Cells past the given contents are blank. DEFAULT: the number of cells given
+        blank -- the blank symbol. DEFAULT: ' '
+        """
+        self.starts = []
+        self.symbols = []
+        n = 0
+        for sym in cells:
+            if n == 0 or sym != self.symbols[-1]:
+                self.starts.append(n)
+                self.symbols.append(sym)
+            n += 1
+        if length is None:
+            length = n
+        if length > n and (n == 0 or self.symbols[-1] != blank):
+            self.starts.append(n)
+            self.symbols.append(blank)
+        self.length = length
+
+    def copy(self):
+        """A copy of the tape, made in time proportional to the number of runs"""
+        tape = rle_tape.__new__(rle_tape)
+        tape.starts = list(self.starts)
+        tape.symbols = list(self.symbols)
+        tape.length = self.length
+        return tape
+
+    __copy__ = copy
+
+    def runs(self):
+        """The number of runs the tape is stored as"""
+        return len(self.starts)
+
+    def __len__(self):
+        return self.length
+
+    def _index(self, i):
+        """Check and normalize a cell index"""
+        if i < 0:
+            i += self.length
+        if i < 0 or i >= self.length:
+            raise IndexError("tape index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if type(i) is int and 0 <= i < self.length:  # the common case, checked first since run() reads every step
+            return self.symbols[bisect.bisect_right(self.starts, i) - 1]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.length))]
+        return self.symbols[bisect.bisect_right(self.starts, self._index(i)) - 1]
+
+    def __setitem__(self, i, sym):
+        if not (type(i) is int and 0 <= i < self.length):
+            i = self._index(i)
+        r = bisect.bisect_right(self.starts, i) - 1
+        old = self.symbols[r]
+        if old == sym:
+            return
+        end = self.starts[r + 1] if r + 1 < len(self.starts) else self.length
+        # split run r into up to three pieces: the cells before i, cell i itself, and the cells after it
+        starts = [i]
+        symbols = [sym]
+        if self.starts[r] < i:
+            starts.insert(0, self.starts[r])
+            symbols.insert(0, old)
+        if i + 1 < end:
+            starts.append(i + 1)
+            symbols.append(old)
+        self.starts[r:r + 1] = starts
+        self.symbols[r:r + 1] = symbols
+        # the new one-cell run may now join the runs next to it
+        k = r + (1 if starts[0] < i else 0)
+        if k + 1 < len(self.starts) and self.symbols[k + 1] == sym:
+            del self.starts[k + 1]
+            del self.symbols[k + 1]
+        if k > 0 and self.symbols[k - 1] == sym:
+            del self.starts[k]
+            del self.symbols[k]
+
+    def __iter__(self):
+        for r in range(len(self.starts)):
+            end = self.starts[r + 1] if r + 1 < len(self.starts) else self.length
+            sym = self.symbols[r]
+            for i in range(self.starts[r], end):
+                yield sym
+
+    def __eq__(self, other):
+        if isinstance(other, rle_tape):
+            return self.length == other.length and self.starts == other.starts and self.symbols == other.symbols
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'rle_tape(' + repr(list(zip(self.symbols, self.starts))) + ', length=' + str(self.length) + ')'
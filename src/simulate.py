@@ -0,0 +1,116 @@
+"""Run a Turing Machine from the command line, without the GUI.
+
+Usage:
+python simulate.py machine.tm "input" [--two-tape] [--one-way] [--verbose] [--trace run.tmt]
+python simulate.py --resume saved.json [--max-steps N] [--max-time SECONDS] [--save-state saved.json]
+python simulate.py machine.tm "input" --break "state 3" --break "step 150000" [--save-state saved.json]
+
+When a step or time budget runs out the run can be saved with --save-state and carried on later with --resume, so a
+long run can be processed in slices. The same goes for stopping at a breakpoint (see turing_machines.breakpoints.parse
+for how to write them).
+
+Exit status: 0 when the machine accepts or halts, 1 when it rejects, 3 at a breakpoint, and 4 when a budget runs out.
+(2 is left to argparse, which uses it for usage errors.)
+"""
+import argparse, sys
+
+from turing_machines import (turing_machine, two_tape_TM, breakpoints, load_state, save_state, memory_report,
+                             BUDGET_EXHAUSTED, BREAKPOINT, MAX_STEPS)
+from tm_trace import trace_writer, SNAPSHOT_INTERVAL
+
+RESULTS = {-1: 'Accept', -2: 'Reject'}
+
+
+def format_result(tm):
+    """Returns a multi-line string describing how a finished run ended, like the Text tab of the GUI"""
+    config = tm.config
+    string = RESULTS.get(config[4], 'Halt') + '\n'
+    string += str(tm.step) + ' steps' + '\n'
+    if isinstance(config[1], tuple):
+        for i in range(2):
+            string += ''.join(config[0][i][config[1][i]:config[2][i] + 1]) + '\n'
+    else:
+        string += ''.join(config[0][config[1]:config[2] + 1]) + '\n'
+    return string
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a Turing Machine")
+    parser.add_argument('file', nargs='?', default=None, help="the .tm file")
+    parser.add_argument('input', nargs='?', default='', help="the tape contents")
+    parser.add_argument('--two-tape', action='store_true', help="the file describes a two tape machine")
+    parser.add_argument('--one-way', action='store_true', help="use a one way infinite tape")
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS, help="step budget for this run (0: no limit)")
+    parser.add_argument('--max-time', type=float, default=None, help="wall-clock budget for this run, in seconds")
+    parser.add_argument('--save-state', default=None, help="if a budget runs out, save the run to this file")
+    parser.add_argument('--resume', default=None, help="carry on a run saved with --save-state")
+    parser.add_argument('--break', dest='breaks', action='append', default=[], metavar='BREAKPOINT',
+                        help="stop at a breakpoint, e.g. 'state 3', 'transition 2 a', 'step 500', 'cell 4', 'head -1'")
+    parser.add_argument('--verbose', action='store_true', help="print every configuration, not just the last")
+    parser.add_argument('--trace', default=None, help="write a binary trace of the run to this file")
+    parser.add_argument('--snapshot-interval', type=int, default=SNAPSHOT_INTERVAL,
+                        help="steps between tape snapshots in the trace")
+    args = parser.parse_args(argv)
+    if args.file is None and args.resume is None:
+        parser.error("a .tm file or --resume is required")
+    if args.breaks and (args.trace or args.verbose):
+        parser.error("--break cannot be combined with --trace or --verbose")
+    if args.resume and args.trace:
+        parser.error("--trace cannot be combined with --resume, as trace steps count from the start of the run")
+    if args.snapshot_interval < 1:
+        parser.error("--snapshot-interval must be at least 1")
+    try:
+        breaks = breakpoints.parse('\n'.join(args.breaks)) if args.breaks else None
+    except ValueError as e:
+        parser.error(str(e))
+    max_steps = args.max_steps or None
+
+    if args.resume:
+        tm = load_state(args.resume, keep_history=False)
+    elif args.two_tape:
+        tm = two_tape_TM(args.file, input=args.input, keep_history=False)
+    else:
+        tm = turing_machine(args.file, input=args.input, bidirectional=not args.one_way, keep_history=False)
+
+    if args.trace or args.verbose:
+        trace = trace_writer(args.trace, tm, args.snapshot_interval) if args.trace else None
+        if trace:
+            trace.write(tm.config)
+        if args.verbose:
+            print('Step: ' + str(tm.step) + '\n' + tm.format_current_config())
+        for config in tm.run_tm_iter(max_steps, args.max_time):
+            if trace:
+                trace.write(config)
+            if args.verbose:
+                print('Step: ' + str(tm.step) + '\n' + tm.format_current_config())
+        if trace:
+            trace.close()
+    else:
+        tm.run(max_steps, args.max_time, breaks)
+
+    if tm.outcome == BREAKPOINT:
+        print('Step: ' + str(tm.step) + '\n' + tm.format_current_config())
+        print('Breakpoint: ' + tm.breakpoint_reason)
+        if args.save_state:
+            save_state(tm, args.save_state)
+            print('Saved the run to ' + args.save_state)
+        print(memory_report(tm))
+        return 3
+    if tm.outcome == BUDGET_EXHAUSTED:
+        print('Budget exhausted after ' + str(tm.step) + ' steps')
+        if args.save_state:
+            save_state(tm, args.save_state)
+            print('Saved the run to ' + args.save_state)
+        print(memory_report(tm))
+        return 4
+    if not args.verbose:
+        print(tm.format_current_config())
+    print(format_result(tm))
+    if tm.breakpoint_reason:
+        print('Breakpoint on the halting step: ' + tm.breakpoint_reason)
+    print(memory_report(tm))
+    return 1 if tm.config[4] == -2 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
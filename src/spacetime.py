@@ -0,0 +1,233 @@
+"""Space-time diagrams of Turing Machine runs.
+
+A space-time diagram is an image with one row per step and one column per tape cell, colored by the symbol in each
+cell, with the head marked. The run is first boiled down to a run_history of arrays (head position and written symbol
+per step); render() then builds the image with vectorized NumPy operations, so long runs draw quickly.
+"""
+import copy, struct, zlib
+import numpy as np
+
+from tm_trace import machine_symbols
+
+MAX_COLUMNS = 4000  # wider tapes are downsampled to at most this many columns
+TRACE_WINDOW = 1 << 20  # steps of a trace read into a history at once
+
+BLANK_COLOR = (255, 255, 255)
+HEAD_COLOR = (220, 20, 20)
+PALETTE = [(31, 119, 180), (255, 127, 14), (44, 160, 44), (148, 103, 189), (140, 86, 75), (227, 119, 194),
+           (127, 127, 127), (188, 189, 34), (23, 190, 207), (174, 199, 232), (255, 187, 120), (152, 223, 138)]
+
+
+class run_history:
+    """The head positions and written symbols of every step of a run, on one tape, as NumPy arrays
+
+    Attributes:
+    symbols -- the list of tape symbols, blank first. Cells are stored as indices into this list
+    heads -- the head position after each step (index 0 is the initial configuration)
+    writes -- writes[k] is the symbol index written at heads[k - 1] during step k (writes[0] is unused)
+    states -- the state after each step
+    initial -- the symbol indices of the initial tape, for the cells from low to high
+    low, high -- the range of cells that the run ever touches
+    """
+
+    def __init__(self, symbols, heads, writes, states, tape, start, end):
+        self.symbols = symbols
+        self.heads = np.array(heads, dtype=np.int32)
+        self.writes = np.array(writes, dtype=np.uint8)
+        self.states = np.array(states, dtype=np.int32)
+        self.low = int(min(self.heads.min(), start))
+        self.high = int(max(self.heads.max(), end))
+        codes = dict((sym, i) for (i, sym) in enumerate(symbols))
+        self.initial = np.array([codes[sym] for sym in tape[self.low:self.high + 1]], dtype=np.uint8)
+        self._sorted = None
+
+    def __len__(self):
+        return len(self.heads)
+
+    def sorted_writes(self):
+        """The writes of the run as (keys, symbols), sorted by key = (cell - low) * len(self) + step. Cached"""
+        if self._sorted is None:
+            n = len(self.heads)
+            keys = (self.heads[:-1].astype(np.int64) - self.low) * n + np.arange(1, n)
+            order = np.argsort(keys, kind='stable')
+            self._sorted = (keys[order], self.writes[1:][order])
+        return self._sorted
+
+
+def history_from_machine(tm, tape=0, steps=None):
+    """Replay the run of a machine from its initial configuration.
+
+    The replay only follows the transition table, so it works however much of the run the machine kept in its history.
+    Args:
+    tm -- the turing_machine or two_tape_TM
+    tape -- which tape to follow on a two tape machine. DEFAULT: 0
+    steps -- how many steps to replay. DEFAULT: up to the current step of the machine
+    Returns:
+    a run_history
+    """
+    if steps is None:
+        steps = tm.step
+    symbols = machine_symbols(tm)
+    codes = dict((sym, i) for (i, sym) in enumerate(symbols))
+    fresh = copy.copy(tm)  # so the machine's own configuration is left alone
+    (tapes, starts, ends, currents, state) = fresh.reset_config()
+    two_tape = isinstance(starts, tuple)
+    if not two_tape:
+        (tapes, starts, ends, currents) = ((tapes, ), (starts, ), (ends, ), (currents, ))
+    tapes = [list(t) for t in tapes]
+    positions = list(currents)
+    last = len(tapes[0]) - 1
+    table = tm.next_state_dict
+
+    heads = [positions[tape]]
+    writes = [0]
+    states = [state]
+    if not two_tape:  # the common case, kept as tight as possible
+        cells = tapes[0]
+        pos = positions[0]
+        for k in range(steps):
+            transition = table.get((state, cells[pos]))
+            if transition is not None:
+                (state, written, direction) = transition
+                cells[pos] = written
+                pos = min(max(pos + direction, 0), last)
+            else:
+                written = cells[pos]
+                if state >= 0:
+                    state = -2
+            heads.append(pos)
+            writes.append(codes[written])
+            states.append(state)
+    else:
+        for k in range(steps):
+            transition = table.get((state, (tapes[0][positions[0]], tapes[1][positions[1]])))
+            written = tapes[tape][positions[tape]]
+            if transition is not None:
+                (state, newsymbols, directions) = transition
+                written = newsymbols[tape]
+                for i in range(2):
+                    tapes[i][positions[i]] = newsymbols[i]
+                    positions[i] = min(max(positions[i] + directions[i], 0), last)
+            elif state >= 0:
+                state = -2
+            heads.append(positions[tape])
+            writes.append(codes[written])
+            states.append(state)
+
+    initial = fresh.config_list[0]
+    if two_tape:
+        return run_history(symbols, heads, writes, states, initial[0][tape], initial[1][tape], initial[2][tape])
+    return run_history(symbols, heads, writes, states, initial[0], initial[1], initial[2])
+
+
+def history_from_trace(reader, tape=0, first=0, count=TRACE_WINDOW):
+    """Read a window of the run stored in an open trace_reader.
+
+    Only the records of the window are read, and they are copied out of the memory map, so the reader can still be
+    closed while the history is in use.
+    Args:
+    reader -- the trace_reader
+    tape -- which tape to follow on a two tape trace. DEFAULT: 0
+    first -- the step the window starts at. It becomes step 0 of the history. DEFAULT: 0
+    count -- the most steps in the window, or None for the rest of the trace. DEFAULT: TRACE_WINDOW
+    Returns:
+    a run_history
+    """
+    nt = reader.ntapes
+    fields = [('state', '<i4')]
+    for i in range(nt):
+        fields += [('start' + str(i), '<i4'), ('end' + str(i), '<i4'), ('head' + str(i), '<i4')]
+    fields += [('sym' + str(i), 'u1') for i in range(nt)]
+    if count is None or first + count > reader.steps:
+        count = reader.steps - first
+    offset = reader._records_offset + first * reader.record.size
+    records = np.frombuffer(reader.map[offset:offset + count * reader.record.size], dtype=np.dtype(fields))
+    initial = reader.config_at(first)
+    if reader.two_tape:
+        (tape_cells, start, end) = (initial[0][tape], initial[1][tape], initial[2][tape])
+    else:
+        (tape_cells, start, end) = (initial[0], initial[1], initial[2])
+    return run_history(reader.symbols, records['head' + str(tape)], records['sym' + str(tape)], records['state'],
+                       tape_cells, start, end)
+
+
+def fit_zoom(history, rows):
+    """The largest zoom level (see render()) at which the whole run fits in the given number of rows"""
+    zoom = 0
+    while -(-len(history) // 2**-zoom) > rows:
+        zoom -= 1
+    return zoom
+
+
+def render(history, zoom=0, first=0, rows=None):
+    """Draw the space-time diagram of a run, or of a window of its steps.
+
+    Args:
+    history -- a run_history
+    zoom -- at zoom 0 each cell of each step is one pixel. A negative zoom z only draws every 2**-z th step, and a
+            positive zoom z draws every cell as a 2**z pixel square. DEFAULT: 0
+    first -- the first step drawn. DEFAULT: 0
+    rows -- the most rows of steps drawn (before any magnification), or None to draw up to the end of the run. The
+            work done only grows with the size of the window, not with the length of the run. DEFAULT: None
+    Returns:
+    a (rows, columns, 3) uint8 array of RGB pixels
+    """
+    n = len(history)
+    row_stride = 2**-zoom if zoom < 0 else 1
+    width = history.high - history.low + 1
+    column_stride = -(-width // MAX_COLUMNS)
+    stop = n if rows is None else min(n, first + rows * row_stride)
+    times = np.arange(first, stop, row_stride)
+    cells = np.arange(0, width, column_stride)
+
+    # the symbol in cell c at step t is the last write to c at a step k <= t, if there is one.
+    # encode each write as the key c * n + k, so that a single sorted search finds it for every (t, c) at once
+    (keys, written) = history.sorted_writes()
+    grid = np.broadcast_to(history.initial[cells], (len(times), len(cells)))
+    if len(keys):
+        queries = cells[np.newaxis, :] * n + times[:, np.newaxis]
+        found = np.searchsorted(keys, queries, side='right') - 1
+        valid = found >= 0
+        found[~valid] = 0
+        valid &= (keys[found] // n) == cells[np.newaxis, :]
+        grid = np.where(valid, written[found], grid)
+
+    colors = np.array([BLANK_COLOR] + [PALETTE[i % len(PALETTE)] for i in range(len(history.symbols) - 1)],
+                      dtype=np.uint8)
+    image = colors[grid]
+    head_columns = (history.heads[times] - history.low) // column_stride
+    image[np.arange(len(times)), head_columns] = HEAD_COLOR
+    if zoom > 0:
+        image = np.repeat(np.repeat(image, 2**zoom, axis=0), 2**zoom, axis=1)
+    return image
+
+
+def render_side_by_side(histories, zoom=0, gap=4, first=0, rows=None):
+    """Draw the space-time diagrams of several tapes of the same run next to each other, split by gray bars"""
+    images = [render(history, zoom, first, rows) for history in histories]
+    bar = np.full((images[0].shape[0], gap, 3), 128, dtype=np.uint8)
+    parts = [images[0]]
+    for image in images[1:]:
+        parts += [bar, image]
+    return np.concatenate(parts, axis=1)
+
+
+def png_bytes(image):
+    """Encode an RGB image array as a PNG file, returned as bytes"""
+    (height, width) = image.shape[:2]
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # each row starts with filter type 0 (none)
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) +
+            chunk(b'IEND', b''))
+
+
+def save_png(image, filename):
+    """Write an RGB image array to a PNG file"""
+    f = open(filename, 'wb')
+    f.write(png_bytes(image))
+    f.close()
@@ -0,0 +1,124 @@
+"""A client for the local simulation service in tm_server.py. It only needs the standard library.
+
+Example:
+client = simulation_client(port=8330)  # or simulation_client(unix_socket='/tmp/tm.sock')
+machine = client.load(open('machine.tm').read())
+print(client.run(machine, '0110')['outcome'])
+print([r['outcome'] for r in client.batch(machine, ['0', '01', '011'])])
+"""
+import http.client, json, select, socket
+
+from tm_server import PORT
+
+
+class unix_connection(http.client.HTTPConnection):
+    """An HTTPConnection over a Unix socket"""
+
+    def __init__(self, path, timeout=None):
+        http.client.HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class simulation_error(Exception):
+    """An error reported by the server. The HTTP status is kept in the status attribute"""
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class simulation_client:
+    """A connection to a simulation server, kept open between requests"""
+
+    def __init__(self, host='127.0.0.1', port=PORT, unix_socket=None, timeout=60.0):
+        """ Connect to a server
+
+        Args:
+        host, port -- where the server listens. DEFAULT: 127.0.0.1, tm_server.PORT
+        unix_socket -- the path of the server's Unix socket, used instead of host and port. DEFAULT: None
+        timeout -- seconds to wait for a reply. DEFAULT: 60.0
+        """
+        if unix_socket:
+            self.connection = unix_connection(unix_socket, timeout)
+        else:
+            self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, path, params):
+        """Send a request and return the decoded reply, raising a simulation_error if the server reports one"""
+        body = json.dumps(params).encode('utf-8')
+        if self._dropped():
+            self.connection.close()
+        try:
+            self.connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        except (BrokenPipeError, ConnectionResetError):
+            # the server dropped the kept-alive connection before it had the whole request, so it cannot have acted
+            # on it: try once more on a new connection. Failures after the request was sent are not retried
+            self.connection.close()
+            self.connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        try:
+            response = self.connection.getresponse()
+        except Exception:
+            self.connection.close()
+            raise
+        reply = json.loads(response.read().decode('utf-8'))
+        if response.status != 200:
+            raise simulation_error(response.status, reply.get('error', response.reason))
+        return reply
+
+    def _dropped(self):
+        """Whether the server has closed the kept-alive connection. The server never sends anything unasked, so a
+        connection that is readable between requests has been closed at the other end
+        """
+        sock = self.connection.sock
+        return sock is not None and len(select.select([sock], [], [], 0)[0]) > 0
+
+    def load(self, spec, two_tape=False):
+        """Register the text of a .tm file with the server and return its hash, to pass as the machine below"""
+        return self.request('/load', {'spec': spec, 'two_tape': two_tape})['machine']
+
+    def run(self, machine, input='', bidirectional=True, max_steps=None, max_time=None):
+        """Run a loaded machine on one input.
+
+        Returns:
+        a dictionary with the outcome (see turing_machines.outcome_of()), the final state, the number of steps, and the
+        used part of each tape
+        """
+        return self.request('/run', self._params(machine, bidirectional, max_steps, max_time, input=input))
+
+    def batch(self, machine, inputs, bidirectional=True, max_steps=None, max_time=None):
+        """Run a loaded machine on each of a list of inputs, and return the list of results (as for run())"""
+        params = self._params(machine, bidirectional, max_steps, max_time, inputs=list(inputs))
+        return self.request('/batch', params)['results']
+
+    def trace(self, machine, input='', bidirectional=True, max_steps=None, max_time=None):
+        """Run a loaded machine on one input, and return its result with the formatted configuration of every step"""
+        return self.request('/trace', self._params(machine, bidirectional, max_steps, max_time, input=input))
+
+    def status(self):
+        """Counters about the server"""
+        return self.request('/status', {})
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _params(machine, bidirectional, max_steps, max_time, **extra):
+        params = {'machine': machine, 'bidirectional': bidirectional}
+        if max_steps is not None:
+            params['max_steps'] = max_steps
+        if max_time is not None:
+            params['max_time'] = max_time
+        params.update(extra)
+        return params
@@ -0,0 +1,315 @@
+"""A local simulation service, so batch users such as autograders do not pay Python startup for every submission.
+
+The server speaks plain HTTP/1.1 with JSON bodies, on localhost or on a Unix socket. It is built on asyncio and hands
+the actual simulation to a pool of worker processes that are started up front and stay warm. Each worker keeps the
+transition tables it has parsed in an LRU cache keyed by the hash of the machine specification.
+
+Endpoints (all POST, see tm_client.py for a client):
+/load -- {"spec", "two_tape"} -> {"machine"}: register a specification and get its hash
+/run -- {"machine" or "spec", "input", ...} -> one result
+/batch -- {"machine" or "spec", "inputs", ...} -> {"results": [...]}
+/trace -- {"machine" or "spec", "input", ...} -> a result plus the formatted configuration of every step
+/status -- {} -> counters about the server
+
+Usage:
+python tm_server.py [--port 8330 | --unix /tmp/tm.sock] [--workers 4] [--max-concurrent 16] [--timeout 10]
+"""
+import argparse, asyncio, collections, concurrent.futures, hashlib, json, os, time
+
+from turing_machines import turing_machine, two_tape_TM, MAX_STEPS
+
+PORT = 8330
+CACHE_SIZE = 64  # transition tables kept by each worker
+SPEC_LIMIT = 4096  # specifications remembered by the server for /load
+MAX_BODY = 16 * 1024 * 1024  # largest request body accepted, in bytes
+MAX_HEADERS = 100  # most header lines accepted in a request
+MAX_TRACE_STEPS = 10000  # most steps a single /trace request may return
+
+# worker process state
+_cache = collections.OrderedDict()
+
+
+def spec_hash(spec, two_tape=False):
+    """The key a specification is known by: the SHA-256 of its text and the kind of machine"""
+    return hashlib.sha256((('2:' if two_tape else '1:') + spec).encode('utf-8')).hexdigest()
+
+
+def _warm_up():
+    """Run in each worker at startup, so the process and its imports are ready before the first request"""
+    return os.getpid()
+
+
+def _machine(key, spec, two_tape, bidirectional):
+    """Build a machine in a worker, reusing the cached transition table for the specification if there is one"""
+    table = _cache.get(key)
+    if table is None:
+        if two_tape:
+            table = two_tape_TM.parse_transition_table(spec.splitlines())
+        else:
+            table = turing_machine.parse_transition_table(spec.splitlines())
+        _cache[key] = table
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    if two_tape:
+        return two_tape_TM(key, keep_history=False, transitions=table)
+    return turing_machine(key, bidirectional=bidirectional, keep_history=False, transitions=table)
+
+
+def _result(tm):
+    """The JSON-ready result of a finished (or stopped) run"""
+    config = tm.config
+    if isinstance(config[1], tuple):
+        tapes = [''.join(config[0][i][config[1][i]:config[2][i] + 1]) for i in range(2)]
+    else:
+        tapes = [''.join(config[0][config[1]:config[2] + 1])]
+    return {'outcome': tm.outcome, 'state': config[4], 'steps': tm.step, 'tapes': tapes}
+
+
+def _work(kind, key, spec, params, deadline):
+    """Carry out one request in a worker process. The deadline (a time.time() value) bounds the wall-clock budget"""
+    tm = _machine(key, spec, params.get('two_tape', False), params.get('bidirectional', True))
+    max_steps = params.get('max_steps', MAX_STEPS) or None  # 0 means no step limit
+    max_time = params.get('max_time')
+
+    def budget():  # the time left for a run: max_time, but never past the deadline
+        remaining = max(deadline - time.time(), 0)
+        return remaining if max_time is None else min(max_time, remaining)
+
+    if kind == 'run':
+        tm.set_input_string(params.get('input', ''))
+        tm.run(max_steps, budget())
+        return _result(tm)
+    if kind == 'batch':
+        results = []
+        for string in params.get('inputs', []):
+            tm.set_input_string(string)
+            tm.run(max_steps, budget())
+            results.append(_result(tm))
+        return {'results': results}
+    # trace
+    tm.set_input_string(params.get('input', ''))
+    max_steps = min(max_steps or MAX_TRACE_STEPS, MAX_TRACE_STEPS)
+    configs = [tm.format_current_config()]
+    for config in tm.run_tm_iter(max_steps, budget()):
+        configs.append(tm.format_config(config))
+    result = _result(tm)
+    result['configs'] = configs
+    return result
+
+
+class request_error(Exception):
+    """A problem with a request, reported back to the client with the given HTTP status"""
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class simulation_server:
+    """The asyncio side of the service: parses requests, limits concurrency, and waits on the worker pool"""
+
+    def __init__(self, workers=None, max_concurrent=16, timeout=10.0):
+        """ Set up a server. Nothing runs until start() is called
+
+        Args:
+        workers -- the number of worker processes. DEFAULT: one per CPU
+        max_concurrent -- the most requests simulated at once. Others wait their turn. DEFAULT: 16
+        timeout -- the most seconds a request may take, including waiting for its turn. DEFAULT: 10.0
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.specs = collections.OrderedDict()
+        self.counts = collections.Counter()
+        self.pool = None
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=PORT, unix_socket=None):
+        """Start the worker pool, warm it up, and begin listening"""
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, _warm_up) for i in range(self.workers)])
+        if unix_socket:
+            self.server = await asyncio.start_unix_server(self.handle, path=unix_socket)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def stop(self):
+        """Stop listening and shut down the workers"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it open for as long as the client wants"""
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except request_error as e:
+                    # the rest of the stream cannot be trusted after a malformed request, so reply and hang up
+                    await self.respond(writer, e.status, {'error': str(e)})
+                    break
+                if request is None:
+                    break
+                (method, path, headers, body) = request
+                try:
+                    status, reply = 200, await self.dispatch(method, path, body)
+                except request_error as e:
+                    status, reply = e.status, {'error': str(e)}
+                await self.respond(writer, status, reply)
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, reply):
+        """Send a JSON reply with the given HTTP status"""
+        self.counts[status] += 1
+        data = json.dumps(reply).encode('utf-8')
+        writer.write(('HTTP/1.1 ' + str(status) + ' ' + _REASONS.get(status, '') + '\r\n' +
+                      'Content-Type: application/json\r\nContent-Length: ' + str(len(data)) +
+                      '\r\n\r\n').encode('latin-1') + data)
+        await writer.drain()
+
+    async def read_request(self, reader):
+        """Read one HTTP request. Returns (method, path, headers, body), or None when the client has gone.
+        Raises a request_error for a request that cannot be read.
+        """
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            parts = line.decode('latin-1').split()
+            if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+                raise request_error(400, "Malformed request line")
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                (name, colon, value) = line.decode('latin-1').partition(':')
+                if not colon or len(headers) >= MAX_HEADERS:
+                    raise request_error(400, "Malformed headers")
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:  # a line longer than the stream limit
+            raise request_error(400, "Request line or header too long")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise request_error(400, "Malformed Content-Length")
+        if length < 0:
+            raise request_error(400, "Malformed Content-Length")
+        if length > MAX_BODY:
+            raise request_error(413, "The body is larger than " + str(MAX_BODY) + " bytes")
+        body = await reader.readexactly(length) if length else b''
+        return (parts[0], parts[1], headers, body)
+
+    async def dispatch(self, method, path, body):
+        """Answer a parsed request, returning the JSON-ready reply or raising a request_error"""
+        if method != 'POST':
+            raise request_error(405, "Only POST is supported")
+        try:
+            params = json.loads(body.decode('utf-8')) if body else {}
+        except ValueError:
+            raise request_error(400, "The body is not valid JSON")
+        if not isinstance(params, dict):
+            raise request_error(400, "The body must be a JSON object")
+        if path == '/status':
+            return {'workers': self.workers, 'machines': len(self.specs), 'responses': dict(self.counts)}
+        if path == '/load':
+            return {'machine': self.remember(params)}
+        if path in ('/run', '/batch', '/trace'):
+            if 'machine' in params:
+                key = params['machine']
+                if not isinstance(key, str) or key not in self.specs:
+                    raise request_error(404, "Unknown machine, /load it first")
+                self.specs.move_to_end(key)
+                (spec, two_tape) = self.specs[key]
+                params['two_tape'] = two_tape
+            else:
+                key = self.remember(params)
+                spec = params['spec']
+            return await self.simulate(path[1:], key, spec, params)
+        raise request_error(404, "No such endpoint: " + path)
+
+    def remember(self, params):
+        """Store the specification in a request and return its hash"""
+        if not isinstance(params.get('spec'), str):
+            raise request_error(400, "A 'spec' string is required")
+        two_tape = bool(params.get('two_tape', False))
+        key = spec_hash(params['spec'], two_tape)
+        self.specs[key] = (params['spec'], two_tape)
+        self.specs.move_to_end(key)
+        if len(self.specs) > SPEC_LIMIT:
+            self.specs.popitem(last=False)
+        return key
+
+    async def simulate(self, kind, key, spec, params):
+        """Wait for a free slot, then run the request on the pool, giving up after the timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = time.time() + self.timeout
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise request_error(503, "The server is busy")
+        try:
+            remaining = max(deadline - time.time(), 0)
+            future = loop.run_in_executor(self.pool, _work, kind, key, spec, params, deadline)
+            # the worker stops itself at the deadline, so allow it a moment to report back before giving up on it
+            return await asyncio.wait_for(future, remaining + 1.0)
+        except asyncio.TimeoutError:
+            raise request_error(504, "The request timed out")
+        except (ValueError, IndexError, KeyError, TypeError) as e:
+            raise request_error(400, "Could not simulate: " + str(e))
+        finally:
+            self.semaphore.release()
+
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout'
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Turing Machine simulations to local clients")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=PORT, help="port to listen on (default: " + str(PORT) + ")")
+    parser.add_argument('--unix', default=None, help="listen on this Unix socket instead of a port")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--max-concurrent', type=int, default=16, help="most requests simulated at once")
+    parser.add_argument('--timeout', type=float, default=10.0, help="seconds before a request is abandoned")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = simulation_server(args.workers, args.max_concurrent, args.timeout)
+        await server.start(args.host, args.port, args.unix)
+        print("Listening on " + (args.unix or args.host + ':' + str(args.port)) + " with " + str(server.workers) +
+              " workers")
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
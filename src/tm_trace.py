@@ -0,0 +1,231 @@
+"""A compact binary trace format for runs of a Turing Machine.
+
+Layout of a trace file (all integers little-endian):
+header -- MAGIC, then (number of tapes, two way flag, snapshot interval, number of symbols), the symbol table as
+          length-prefixed UTF-8 strings, and the length-prefixed name of the configuration file
+records -- one fixed-size record per step: the state, then (start, end, head) for each tape, then for each tape the
+           index of the symbol now in the cell the head was over before the step (i.e. the cell written in that step)
+snapshots -- every snapshot interval steps, the written part of each tape as (low, length, symbol indices)
+index -- the number of snapshots followed by a (step, file offset) pair for each of them
+trailer -- INDEX_MAGIC, the number of records, and the file offset of the index
+
+Any step can be rebuilt from the closest snapshot before it plus at most snapshot interval records, so a reader only
+ever touches a small part of the file. The reader maps the file with mmap instead of loading it.
+"""
+import bisect, mmap, shutil, struct, tempfile
+
+MAGIC = b'TMTRACE1'
+INDEX_MAGIC = b'TMTINDEX'
+SNAPSHOT_INTERVAL = 1024  # default number of steps between tape snapshots
+TAPE_LENGTH = 20000  # matches the finite tapes used by the simulator classes
+
+_HEADER = struct.Struct('<BBIH')
+_LENGTH = struct.Struct('<H')
+_TAPE = struct.Struct('<iI')
+_INDEX_ENTRY = struct.Struct('<QQ')
+_COUNT = struct.Struct('<Q')
+_TRAILER = struct.Struct('<8sQQ')
+
+
+def _record_struct(ntapes):
+    """The struct for a single step record of a machine with the given number of tapes"""
+    return struct.Struct('<i' + 'iii' * ntapes + 'B' * ntapes)
+
+
+def machine_symbols(tm):
+    """Every symbol the given machine could ever have on its tape(s), blank first"""
+    symbols = set(tm.inputstring)
+    for ((state, sym), (newstate, newsym, direction)) in tm.next_state_dict.items():
+        if isinstance(sym, tuple):
+            symbols.update(sym)
+            symbols.update(newsym)
+        else:
+            symbols.add(sym)
+            symbols.add(newsym)
+    symbols.discard(' ')
+    return [' '] + sorted(symbols)
+
+
+class trace_writer:
+    """Write a trace file one configuration at a time.
+
+    Feed it the initial configuration and then every following configuration of a run, in order.
+    """
+
+    def __init__(self, filename, tm, snapshot_interval=SNAPSHOT_INTERVAL):
+        """ Open a trace file for writing
+
+        Args:
+        filename -- the name of the trace file
+        tm -- the turing_machine or two_tape_TM being traced
+        snapshot_interval -- the number of steps between snapshots of the tape(s). DEFAULT: SNAPSHOT_INTERVAL
+        """
+        if snapshot_interval < 1:
+            raise ValueError("The snapshot interval must be at least 1 step")
+        self.two_tape = isinstance(tm.config[1], tuple)
+        self.ntapes = 2 if self.two_tape else 1
+        self.interval = snapshot_interval
+        self.symbols = machine_symbols(tm)
+        if len(self.symbols) > 256:
+            raise ValueError("A trace can only hold machines with at most 256 tape symbols")
+        self.codes = dict((sym, i) for (i, sym) in enumerate(self.symbols))
+        self.record = _record_struct(self.ntapes)
+        self.steps = 0
+        self._heads = None
+        self._index = []
+
+        self.file = open(filename, 'wb')
+        self._snapshots = tempfile.TemporaryFile()
+        self.file.write(MAGIC)
+        self.file.write(_HEADER.pack(self.ntapes, getattr(tm, 'two_way', True), self.interval, len(self.symbols)))
+        for sym in self.symbols + [tm.file]:
+            data = sym.encode('utf-8')
+            self.file.write(_LENGTH.pack(len(data)))
+            self.file.write(data)
+
+    def _split(self, config):
+        """Return the tapes, starts, ends, and heads of a configuration as tuples, whatever the number of tapes"""
+        if self.two_tape:
+            return config[:4]
+        return ((config[0], ), (config[1], ), (config[2], ), (config[3], ))
+
+    def write(self, config):
+        """Append the next configuration of the run to the trace"""
+        (tapes, starts, ends, heads) = self._split(config)
+        previous = self._heads if self._heads is not None else heads
+        values = [config[4]]
+        for i in range(self.ntapes):
+            values.extend((starts[i], ends[i], heads[i]))
+        values.extend(self.codes[tapes[i][previous[i]]] for i in range(self.ntapes))
+        self.file.write(self.record.pack(*values))
+
+        if self.steps % self.interval == 0:
+            self._index.append((self.steps, self._snapshots.tell()))
+            for i in range(self.ntapes):
+                low = min(starts[i], heads[i])
+                high = max(ends[i], heads[i])
+                cells = bytearray(self.codes[sym] for sym in tapes[i][low:high + 1])
+                self._snapshots.write(_TAPE.pack(low, len(cells)))
+                self._snapshots.write(cells)
+        self._heads = heads
+        self.steps += 1
+
+    def close(self):
+        """Write out the snapshots, index, and trailer, and close the file"""
+        base = self.file.tell()
+        self._snapshots.seek(0)
+        shutil.copyfileobj(self._snapshots, self.file)
+        self._snapshots.close()
+        index_offset = self.file.tell()
+        self.file.write(_COUNT.pack(len(self._index)))
+        for (step, offset) in self._index:
+            self.file.write(_INDEX_ENTRY.pack(step, base + offset))
+        self.file.write(_TRAILER.pack(INDEX_MAGIC, self.steps, index_offset))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class trace_reader:
+    """Random access to the configurations stored in a trace file, through mmap"""
+
+    def __init__(self, filename):
+        """ Open a trace file for reading
+
+        Args:
+        filename -- the name of the trace file
+        """
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < len(MAGIC) + _TRAILER.size or self.map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(filename + " is not a trace file")
+        (magic, self.steps, index_offset) = _TRAILER.unpack_from(self.map, len(self.map) - _TRAILER.size)
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(filename + " is not a complete trace file")
+
+        offset = len(MAGIC)
+        (self.ntapes, two_way, self.interval, nsymbols) = _HEADER.unpack_from(self.map, offset)
+        offset += _HEADER.size
+        strings = []
+        for i in range(nsymbols + 1):
+            (length, ) = _LENGTH.unpack_from(self.map, offset)
+            offset += _LENGTH.size
+            strings.append(self.map[offset:offset + length].decode('utf-8'))
+            offset += length
+        self.symbols = strings[:-1]
+        self.machine_file = strings[-1]
+        self.two_tape = self.ntapes == 2
+        self.two_way = bool(two_way)
+        self.record = _record_struct(self.ntapes)
+        self._records_offset = offset
+
+        (count, ) = _COUNT.unpack_from(self.map, index_offset)
+        self._snapshot_steps = []
+        self._snapshot_offsets = []
+        for i in range(count):
+            (step, snapshot) = _INDEX_ENTRY.unpack_from(self.map, index_offset + _COUNT.size + i * _INDEX_ENTRY.size)
+            self._snapshot_steps.append(step)
+            self._snapshot_offsets.append(snapshot)
+
+    def __len__(self):
+        return self.steps
+
+    def read_record(self, n):
+        """Return the raw record of step n as a tuple (state, (start, end, head) per tape..., symbol code per tape...)"""
+        return self.record.unpack_from(self.map, self._records_offset + n * self.record.size)
+
+    def config_at(self, n):
+        """Rebuild the configuration at step n, in the same form the simulator classes use
+
+        Returns:
+        In one tape mode: a tuple (T,s,e,p,q), where T is a list containing the tape, s,e, and p are indecies corresponding to start, end, and head position on the tape contents, and q is the state (an integer)
+        In two tape mode: a tuple (T,s,e,p,q) with the same meanings, except T,s,e, and p are tuples with two values, for tape 1 and tape 2
+        """
+        if n < 0 or n >= self.steps:
+            raise IndexError("step " + str(n) + " is not in the trace")
+        i = bisect.bisect_right(self._snapshot_steps, n) - 1
+        snapshot_step = self._snapshot_steps[i]
+        k = self._snapshot_offsets[i]
+        symbols = self.symbols
+        tapes = []
+        for i in range(self.ntapes):
+            (low, length) = _TAPE.unpack_from(self.map, k)
+            k += _TAPE.size
+            tape = [' '] * TAPE_LENGTH
+            tape[low:low + length] = [symbols[c] for c in self.map[k:k + length]]
+            k += length
+            tapes.append(tape)
+
+        nt = self.ntapes
+        record = self.read_record(snapshot_step)
+        for step in range(snapshot_step + 1, n + 1):
+            heads = record[3:1 + 3 * nt:3]
+            record = self.read_record(step)
+            for i in range(nt):
+                tapes[i][heads[i]] = symbols[record[1 + 3 * nt + i]]
+
+        state = record[0]
+        starts = record[1:1 + 3 * nt:3]
+        ends = record[2:1 + 3 * nt:3]
+        heads = record[3:1 + 3 * nt:3]
+        if self.two_tape:
+            return (tuple(tapes), starts, ends, heads, state)
+        return (tapes[0], starts[0], ends[0], heads[0], state)
+
+    def close(self):
+        """Release the mapping and the file"""
+        self.map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
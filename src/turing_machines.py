@@ -1,4 +1,112 @@
-MAX_STEPS = 200000  # constant for how long to run before giving up
+import bisect, copy, json, sys, time
+
+from rle_tape import rle_tape
+
+MAX_STEPS = 200000  # default step budget for a run before giving up
+TIME_CHECK_INTERVAL = 1000  # how many steps run() takes between looking at the clock
+HISTORY_BUDGET = 256 * 2**20  # default bytes of past configurations kept for stepping back, see thin_history()
+
+# outcomes of a run, see outcome_of()
+RUNNING = 'running'
+ACCEPTED = 'accept'
+REJECTED = 'reject'
+HALTED = 'halt'
+BUDGET_EXHAUSTED = 'budget exhausted'
+BREAKPOINT = 'breakpoint'
+
+
+def outcome_of(state):
+    """The outcome of a run that is in the given state. Never returns BUDGET_EXHAUSTED or BREAKPOINT, which only the run methods report"""
+    if state >= 0:
+        return RUNNING
+    if state == -1:
+        return ACCEPTED
+    if state == -2:
+        return REJECTED
+    return HALTED
+
+
+def make_tape(cells, run_length=False):
+    """Turn a list of cells into a tape: the list itself, or an rle_tape if run_length is True. An rle_tape is kept as it is"""
+    if run_length and not isinstance(cells, rle_tape):
+        return rle_tape(cells)
+    return cells
+
+
+def copy_tape(tape):
+    """A copy of a tape for run() to write to, in the same form. An rle_tape is copied run by run, without expanding it"""
+    if isinstance(tape, rle_tape):
+        return tape.copy()
+    return list(tape)
+
+
+# memory use of the history
+def tape_bytes(tape):
+    """Roughly how many bytes a tape takes up. The symbols themselves are shared between tapes, so they are not counted"""
+    if isinstance(tape, rle_tape):
+        return (sys.getsizeof(tape) + sys.getsizeof(tape.__dict__) + sys.getsizeof(tape.starts) +
+                sys.getsizeof(tape.symbols) + 28 * len(tape.starts))
+    return sys.getsizeof(tape)
+
+
+def config_bytes(config):
+    """Roughly how many bytes a configuration takes up, tapes included"""
+    if isinstance(config[0], tuple):
+        return sys.getsizeof(config) + tape_bytes(config[0][0]) + tape_bytes(config[0][1])
+    return sys.getsizeof(config) + tape_bytes(config[0])
+
+
+def history_bytes(tm):
+    """How many bytes the past configurations a machine keeps (its checkpoints and all but the last of its config_list) take up"""
+    total = 0
+    for (step, config) in tm.checkpoints:
+        total += config_bytes(config)
+    for config in tm.config_list[:-1]:
+        total += config_bytes(config)
+    return total
+
+
+def thin_history(tm):
+    """Bring the history of a machine back within its history_budget.
+
+    The older half of the exact history is moved out to sparse checkpoints, one every checkpoint_stride steps. Once the
+    checkpoints take up half the budget, every other one is dropped and the stride doubles. So recent steps stay exact,
+    and going back further replays from the checkpoint before (see go_back_to_step()). If even one past configuration
+    is over the budget, nothing but the current configuration is kept.
+    """
+    while tm.history_bytes > tm.history_budget:
+        checkpoints = 0
+        for (step, config) in tm.checkpoints:
+            checkpoints += config_bytes(config)
+        if len(tm.config_list) > 2 and checkpoints <= tm.history_budget // 2:
+            first = tm.step - len(tm.config_list) + 1
+            half = len(tm.config_list) // 2
+            for i in range(half):
+                if (first + i) % tm.checkpoint_stride == 0:
+                    tm.checkpoints.append((first + i, tm.config_list[i]))
+            tm.config_list = tm.config_list[half:]
+        elif len(tm.checkpoints) > 0:
+            tm.checkpoints = tm.checkpoints[1::2]
+            tm.checkpoint_stride *= 2
+        else:
+            tm.config_list = tm.config_list[-1:]
+        tm.history_bytes = history_bytes(tm)
+
+
+def memory_report(tm):
+    """A one line description of the memory a machine is using, for status displays"""
+    (history, tapes) = tm.memory_usage()
+    string = "History: " + megabytes(history) + " (" + str(len(tm.config_list)) + " exact"
+    if len(tm.checkpoints) > 0:
+        string += ", " + str(len(tm.checkpoints)) + " checkpoints"
+    if tm.keep_history:
+        string += ", budget " + megabytes(tm.history_budget)
+    return string + "), tapes: " + megabytes(tapes)
+
+
+def megabytes(n):
+    """A number of bytes written in megabytes"""
+    return str(round(n / 2.0**20, 1)) + " MB"
 
 
 class turing_machine:
@@ -6,17 +114,33 @@ class turing_machine:
     Construct an instance with the name of a configuration file to create a turing machine
     """
 
-    def __init__(self, configuration_file, input="", bidirectional=True):
+    def __init__(self,
+                 configuration_file,
+                 input="",
+                 bidirectional=True,
+                 keep_history=True,
+                 run_length_tape=False,
+                 transitions=None,
+                 history_budget=HISTORY_BUDGET):
         """ Initialize a TM
 
         Args:
         configuration_file -- a string containing the name of the config file
         input -- the tape contents. DEFAULT: "". Can be updated later with set_input_string()
         bidirectional -- a boolean informing the simulator whether it is a 1 or 2 way tape. DEFAULT: True
+        keep_history -- whether to keep every configuration of the run for stepping back. If False, going back re-runs the machine from the start. DEFAULT: True
+        run_length_tape -- whether to store tapes as runs of equal symbols (see rle_tape.py), which saves memory on tapes with long uniform stretches, at some cost in speed. DEFAULT: False
+        transitions -- a transition table to use instead of reading configuration_file, which is then only kept as a name. DEFAULT: None
+        history_budget -- the most bytes of past configurations to keep for stepping back. Older history is thinned to checkpoints to stay within it (see thin_history()). DEFAULT: HISTORY_BUDGET
         """
         self.file = configuration_file
         self.two_way = bidirectional
-        self.next_state_dict = self.read_transition_table(self.file)
+        self.keep_history = keep_history
+        self.run_length_tape = run_length_tape
+        self.history_budget = history_budget
+        if transitions is None:
+            transitions = self.read_transition_table(self.file)
+        self.next_state_dict = transitions
         self.inputstring = input
         self.reset_config()
 
@@ -31,6 +155,21 @@ class turing_machine:
         self.two_way = value
         return self.reset_config()
 
+    def set_history_budget(self, budget):
+        """Change how many bytes of past configurations the machine may keep, thinning the history at once if it is over"""
+        self.history_budget = budget
+        if self.history_bytes > budget:
+            thin_history(self)
+
+    def memory_usage(self):
+        """Returns a tuple (H,T) of roughly how many bytes the history and the current tapes take up"""
+        return (self.history_bytes, config_bytes(self.config))
+
+    def set_run_length_tape(self, value):
+        """Choose whether the tape is stored as runs of equal symbols. Also refreshes the configuration, and returns the initial configuration (see reset_config())"""
+        self.run_length_tape = value
+        return self.reset_config()
+
     def reset_config(self):
         """Refresh the configuration of the machine so it is ready for a fresh run
 
@@ -42,13 +181,20 @@ class turing_machine:
         self.config_list = None
         if self.two_way:
             table = [' '] * 10000 + list(self.inputstring) + [' '] * (10000 - len(self.inputstring))
+            table = make_tape(table, self.run_length_tape)
             self.config = (table, 10000, 10000 + len(self.inputstring) - 1, 10000, 0)
         else:
             table = list(self.inputstring) + [' '] * (20000 - len(self.inputstring))
+            table = make_tape(table, self.run_length_tape)
             self.config = (table, 0, len(self.inputstring) - 1, 0, 0)
         self.step = 0
+        self.outcome = RUNNING
+        self.breakpoint_reason = None
 
         self.config_list = [self.config]
+        self.checkpoints = []  # (step, configuration) pairs from before the start of config_list
+        self.checkpoint_stride = 2
+        self.history_bytes = 0
         return self.config
 
     def go_back_to_step(self, n):
@@ -56,12 +202,33 @@ class turing_machine:
 
         Assumption: n < self.step, zero-indexed
         """
+        first = self.step - len(self.config_list) + 1  # the exact history holds the configurations of steps first to self.step
         if n == 0:
             self.reset_config()
             return self.config
+        i = -1
+        if n < first:
+            i = bisect.bisect_right([checkpoint[0] for checkpoint in self.checkpoints], n) - 1
+        if i >= 0:  # replay from the last checkpoint before it
+            (self.step, self.config) = self.checkpoints[i]
+            self.config_list = [self.config]
+            self.checkpoints = self.checkpoints[:i]
+            self.history_bytes = history_bytes(self)
+            while self.step < n:
+                self.next_config()
+            self.outcome = outcome_of(self.config[4])
+            return self.config
+        if n < first or n > self.step:  # not in the history, so run it again
+            self.reset_config()
+            self.run(n)
+            while self.step < n:
+                self.next_config()
+            return self.config
         self.step = n
-        self.config = self.config_list[n]
-        self.config_list = list(self.config_list[:n + 1])
+        self.config = self.config_list[n - first]
+        self.config_list = list(self.config_list[:n - first + 1])
+        self.history_bytes = history_bytes(self)
+        self.outcome = outcome_of(self.config[4])
         return self.config
 
     def previous_config(self):
@@ -74,7 +241,11 @@ class turing_machine:
         if (len(self.config_list) > 1):
             self.config = self.config_list[-2]
             self.config_list = list(self.config_list[:-1])
+            self.history_bytes -= config_bytes(self.config)
             self.step -= 1
+            self.outcome = outcome_of(self.config[4])
+        elif self.step > 0:
+            self.go_back_to_step(self.step - 1)
 
         return self.config
 
@@ -86,7 +257,7 @@ class turing_machine:
         In two tape mode: a tuple (T,s,e,p,q) with the same meanings, except T,s,e, and p are tuples with two values, for tape 1 and tape 2
         """
         (tape, start, end, current, state) = self.config
-        tape = list(tape)  # copy the tape
+        tape = copy.copy(tape)  # copy the tape
         table = self.next_state_dict
         symbol = tape[current]
         if (state, symbol) in table:
@@ -112,26 +283,119 @@ class turing_machine:
             newstart = start
             newend = end
         newconfig = (tape, newstart, newend, newcurrent, newstate)
-        self.config_list.append(newconfig)
+        if self.keep_history:
+            self.history_bytes += config_bytes(self.config)
+            self.config_list.append(newconfig)
+        else:
+            self.config_list = [newconfig]
         self.config = newconfig
         self.step += 1
+        self.outcome = outcome_of(newstate)
+        if self.history_bytes > self.history_budget:
+            thin_history(self)
 
         return self.config
 
     # useful methods in running or displaying the machine
-    def run_tm_iter(self):
-        """A generator function for the configurations of the TM. This effectively recreates the original simulator if used in a for-loop with a print function"""
+    def run_tm_iter(self, max_steps=MAX_STEPS, max_time=None):
+        """A generator function for the configurations of the TM. This effectively recreates the original simulator if used in a for-loop with a print function
+
+        Stops when the machine halts or a budget runs out. In the latter case outcome is set to BUDGET_EXHAUSTED, and iterating again resumes the run.
+        Args:
+        max_steps -- the most steps to take, or None for no limit. DEFAULT: MAX_STEPS
+        max_time -- the most wall-clock seconds to spend, or None for no limit. DEFAULT: None
+        """
+        taken = 0
+        deadline = None if max_time is None else time.time() + max_time
         while self.config[4] >= 0:
-            if self.step > MAX_STEPS:
-                break
+            if (max_steps is not None and taken >= max_steps) or (deadline is not None and time.time() >= deadline):
+                self.outcome = BUDGET_EXHAUSTED
+                return
             self.next_config()
+            taken += 1
             yield self.config
 
+    def run(self, max_steps=MAX_STEPS, max_time=None, breaks=None, counts=None):
+        """Run the machine until it halts or a budget runs out, as fast as possible.
+
+        The tape is written in place and only the final configuration is added to the history, so stepping back from it re-runs the machine.
+        Calling run() again after the budget runs out or a breakpoint is hit resumes exactly where it stopped.
+        Args:
+        max_steps -- the most steps to take, or None for no limit. DEFAULT: MAX_STEPS
+        max_time -- the most wall-clock seconds to spend, or None for no limit. DEFAULT: None
+        breaks -- a breakpoints object to stop at. The reason for stopping is then left in breakpoint_reason, which also describes the breakpoints hit by the last step when that step halts the machine (the outcome is then the halt). DEFAULT: None
+        counts -- a collections.Counter to add the number of times each transition is taken to, keyed by the (q, c) keys of the transition table. DEFAULT: None
+        Returns:
+        the outcome of the run: ACCEPTED, REJECTED, HALTED, BUDGET_EXHAUSTED, or BREAKPOINT
+        """
+        (tape, start, end, current, state) = self.config
+        tape = copy_tape(tape)  # copy the tape once
+        (table, cells, heads, max_steps) = (breaks or NO_BREAKPOINTS).compile(self, max_steps)
+        watch = len(cells) > 0 or len(heads) > 0
+        last = len(tape) - 1
+        taken = 0
+        trap = False
+        key = where = None
+        counting = counts is not None
+        taken_keys = []
+        deadline = None if max_time is None else time.time() + max_time
+        while state >= 0 and not trap:
+            chunk = TIME_CHECK_INTERVAL if max_steps is None else min(TIME_CHECK_INTERVAL, max_steps - taken)
+            if chunk <= 0 or (deadline is not None and time.time() >= deadline):
+                break
+            for i in range(chunk):
+                symbol = tape[current]
+                key = (state, symbol)
+                if key in table:
+                    (state, newsymbol, direction, trap) = table[key]
+                    tape[current] = newsymbol
+                    if current < start and newsymbol != ' ':
+                        start = current
+                    if current > end and newsymbol != ' ':
+                        end = current
+                    where = current
+                    if counting:
+                        taken_keys.append(key)
+                    current = min(max(current + direction, 0), last)
+                    if watch and ((where in cells and newsymbol != symbol) or current in heads):
+                        trap = True
+                else:
+                    state = -2
+                    trap = table.reject_trap
+                    where = None  # nothing was written
+                taken += 1
+                if state < 0 or trap:
+                    break
+            if counting:  # counted a chunk at a time, which Counter.update() does in C
+                counts.update(taken_keys)
+                del taken_keys[:]
+        tape = make_tape(tape, self.run_length_tape)
+        return self._finish_run((tape, start, end, current, state), taken, breaks, key, (where, ))
+
+    def _finish_run(self, config, taken, breaks, key, where):
+        """Store the configuration reached by run() after the given number of steps, and return the outcome"""
+        if taken > 0:
+            self.config = config
+            self.config_list = [config]
+            self.history_bytes = history_bytes(self)
+            self.step += taken
+        self.breakpoint_reason = None
+        if breaks is not None and taken > 0:
+            self.breakpoint_reason = breaks.explain(self, key, where)
+        if self.config[4] < 0:  # a breakpoint hit by the halting step is still left in breakpoint_reason
+            self.outcome = outcome_of(self.config[4])
+        elif self.breakpoint_reason:
+            self.outcome = BREAKPOINT
+        else:
+            self.outcome = BUDGET_EXHAUSTED
+        return self.outcome
+
     def format_current_config(self):
         """Returns a multi-line string of the current configuration"""
         return self.format_config(self.config)
 
-    def format_config(self, config):
+    @staticmethod
+    def format_config(config):
         """Returns a multi-line string of the given configuration
 
         Arg:
@@ -157,7 +421,8 @@ class turing_machine:
         return string
 
     # technical method to load the data
-    def read_transition_table(self, filename):
+    @staticmethod
+    def read_transition_table(filename):
         """Read the configuration file into a dictionary for the simulator to use.
 
         Based on the code in Howard Straubing's original simulator
@@ -166,8 +431,15 @@ class turing_machine:
         In two-tape mode, c,c',and D are tuples containing two values corresponding to tape 1 and tape 2's characters/directions. D can also be 0
         """
         f = open(filename, 'r')
+        d = turing_machine.parse_transition_table(f)
+        f.close()
+        return d
+
+    @staticmethod
+    def parse_transition_table(lines):
+        """Parse the lines of a configuration file, given as any iterable of strings, into a transition table (see read_transition_table())"""
         d = {}
-        for line in f:
+        for line in lines:
             seq = line.split()
             if (len(seq) > 0) and (seq[0][0] != '#'):
                 state = int(seq[0])
@@ -183,7 +455,6 @@ class turing_machine:
                 else:
                     direction = 1
                 d[(state, sym)] = (newstate, newsym, direction)
-        f.close()
         return d
 
 
@@ -191,15 +462,30 @@ class two_tape_TM:
     """This class serves as an object-oriented version of Howard Struabing's Turing Machine Simulator, but for two tapes
     """
 
-    def __init__(self, configuration_file, input=""):
+    def __init__(self,
+                 configuration_file,
+                 input="",
+                 keep_history=True,
+                 run_length_tape=False,
+                 transitions=None,
+                 history_budget=HISTORY_BUDGET):
         """ Initialize a TM
 
         Args:
         configuration_file -- a string containing the name of the config file
         input -- the tape contents. DEFAULT: "". Can be updated later with set_input_string()
+        keep_history -- whether to keep every configuration of the run for stepping back. If False, going back re-runs the machine from the start. DEFAULT: True
+        run_length_tape -- whether to store tapes as runs of equal symbols (see rle_tape.py), which saves memory on tapes with long uniform stretches, at some cost in speed. DEFAULT: False
+        transitions -- a transition table to use instead of reading configuration_file, which is then only kept as a name. DEFAULT: None
+        history_budget -- the most bytes of past configurations to keep for stepping back. Older history is thinned to checkpoints to stay within it (see thin_history()). DEFAULT: HISTORY_BUDGET
         """
         self.file = configuration_file
-        self.next_state_dict = self.read_transition_table(self.file)
+        self.keep_history = keep_history
+        self.run_length_tape = run_length_tape
+        self.history_budget = history_budget
+        if transitions is None:
+            transitions = self.read_transition_table(self.file)
+        self.next_state_dict = transitions
         self.inputstring = input
         self.reset_config()
 
@@ -209,6 +495,21 @@ class two_tape_TM:
         self.inputstring = string
         return self.reset_config()
 
+    def set_history_budget(self, budget):
+        """Change how many bytes of past configurations the machine may keep, thinning the history at once if it is over"""
+        self.history_budget = budget
+        if self.history_bytes > budget:
+            thin_history(self)
+
+    def memory_usage(self):
+        """Returns a tuple (H,T) of roughly how many bytes the history and the current tapes take up"""
+        return (self.history_bytes, config_bytes(self.config))
+
+    def set_run_length_tape(self, value):
+        """Choose whether the tapes are stored as runs of equal symbols. Also refreshes the configuration, and returns the initial configuration (see reset_config())"""
+        self.run_length_tape = value
+        return self.reset_config()
+
     def reset_config(self):
         """Refresh the configuration of the machine so it is ready for a fresh run
 
@@ -219,10 +520,16 @@ class two_tape_TM:
         self.config_list = None
         table1 = [' '] * 10000 + list(self.inputstring) + [' '] * (10000 - len(self.inputstring))
         table2 = [' '] * 20000
+        (table1, table2) = (make_tape(table1, self.run_length_tape), make_tape(table2, self.run_length_tape))
         self.config = ((table1, table2), (10000, 10000), (10000 + len(self.inputstring) - 1,
                                                           10000 + len(self.inputstring) - 1), (10000, 10000), 0)
         self.step = 0
+        self.outcome = RUNNING
+        self.breakpoint_reason = None
         self.config_list = [self.config]
+        self.checkpoints = []  # (step, configuration) pairs from before the start of config_list
+        self.checkpoint_stride = 2
+        self.history_bytes = 0
         return self.config
 
     def go_back_to_step(self, n):
@@ -230,12 +537,33 @@ class two_tape_TM:
 
         Assumption: n < self.step, zero-indexed
         """
+        first = self.step - len(self.config_list) + 1  # the exact history holds the configurations of steps first to self.step
         if n == 0:
             self.reset_config()
             return self.config
+        i = -1
+        if n < first:
+            i = bisect.bisect_right([checkpoint[0] for checkpoint in self.checkpoints], n) - 1
+        if i >= 0:  # replay from the last checkpoint before it
+            (self.step, self.config) = self.checkpoints[i]
+            self.config_list = [self.config]
+            self.checkpoints = self.checkpoints[:i]
+            self.history_bytes = history_bytes(self)
+            while self.step < n:
+                self.next_config()
+            self.outcome = outcome_of(self.config[4])
+            return self.config
+        if n < first or n > self.step:  # not in the history, so run it again
+            self.reset_config()
+            self.run(n)
+            while self.step < n:
+                self.next_config()
+            return self.config
         self.step = n
-        self.config = self.config_list[n]
-        self.config_list = list(self.config_list[:n + 1])
+        self.config = self.config_list[n - first]
+        self.config_list = list(self.config_list[:n - first + 1])
+        self.history_bytes = history_bytes(self)
+        self.outcome = outcome_of(self.config[4])
         return self.config
 
     def previous_config(self):
@@ -247,7 +575,11 @@ class two_tape_TM:
         if (len(self.config_list) > 1):
             self.config = self.config_list[-2]
             self.config_list = list(self.config_list[:-1])
+            self.history_bytes -= config_bytes(self.config)
             self.step -= 1
+            self.outcome = outcome_of(self.config[4])
+        elif self.step > 0:
+            self.go_back_to_step(self.step - 1)
 
         return self.config
 
@@ -260,8 +592,8 @@ class two_tape_TM:
 
         (tapes, starts, ends, currents, state) = self.config
         (t1, t2) = tapes
-        t1 = list(t1)  # copy the lists
-        t2 = list(t2)
+        t1 = copy.copy(t1)  # copy the tapes
+        t2 = copy.copy(t2)
         (s1, s2) = starts
         (e1, e2) = ends
         (c1, c2) = currents
@@ -313,21 +645,124 @@ class two_tape_TM:
             newend2 = e2
 
         newconfig = ((t1, t2), (newstart1, newstart2), (newend1, newend2), (newcurrent1, newcurrent2), newstate)
-        self.config_list.append(newconfig)
+        if self.keep_history:
+            self.history_bytes += config_bytes(self.config)
+            self.config_list.append(newconfig)
+        else:
+            self.config_list = [newconfig]
         self.config = newconfig
         self.step += 1
+        self.outcome = outcome_of(newstate)
+        if self.history_bytes > self.history_budget:
+            thin_history(self)
 
         return self.config
 
     # useful methods in running or displaying the machine
-    def run_tm_iter(self):
-        """A generator function for the configurations of the TM. This effectively recreates the original simulator if used in a for-loop with a print function"""
+    def run_tm_iter(self, max_steps=MAX_STEPS, max_time=None):
+        """A generator function for the configurations of the TM. This effectively recreates the original simulator if used in a for-loop with a print function
+
+        Stops when the machine halts or a budget runs out. In the latter case outcome is set to BUDGET_EXHAUSTED, and iterating again resumes the run.
+        Args:
+        max_steps -- the most steps to take, or None for no limit. DEFAULT: MAX_STEPS
+        max_time -- the most wall-clock seconds to spend, or None for no limit. DEFAULT: None
+        """
+        taken = 0
+        deadline = None if max_time is None else time.time() + max_time
         while self.config[4] >= 0:
-            if self.step > MAX_STEPS:
-                break
+            if (max_steps is not None and taken >= max_steps) or (deadline is not None and time.time() >= deadline):
+                self.outcome = BUDGET_EXHAUSTED
+                return
             self.next_config()
+            taken += 1
             yield self.config
 
+    def run(self, max_steps=MAX_STEPS, max_time=None, breaks=None, counts=None):
+        """Run the machine until it halts or a budget runs out, as fast as possible.
+
+        The tape is written in place and only the final configuration is added to the history, so stepping back from it re-runs the machine.
+        Calling run() again after the budget runs out or a breakpoint is hit resumes exactly where it stopped.
+        Args:
+        max_steps -- the most steps to take, or None for no limit. DEFAULT: MAX_STEPS
+        max_time -- the most wall-clock seconds to spend, or None for no limit. DEFAULT: None
+        breaks -- a breakpoints object to stop at. The reason for stopping is then left in breakpoint_reason, which also describes the breakpoints hit by the last step when that step halts the machine (the outcome is then the halt). DEFAULT: None
+        counts -- a collections.Counter to add the number of times each transition is taken to, keyed by the (q, c) keys of the transition table. DEFAULT: None
+        Returns:
+        the outcome of the run: ACCEPTED, REJECTED, HALTED, BUDGET_EXHAUSTED, or BREAKPOINT
+        """
+        (tapes, starts, ends, currents, state) = self.config
+        (t1, t2) = (copy_tape(tapes[0]), copy_tape(tapes[1]))  # copy the tapes once
+        (s1, s2) = starts
+        (e1, e2) = ends
+        (c1, c2) = currents
+        (table, cells, heads, max_steps) = (breaks or NO_BREAKPOINTS).compile(self, max_steps)
+        watch = len(cells) > 0 or len(heads) > 0
+        last = len(t1) - 1
+        taken = 0
+        trap = False
+        key = where = None
+        counting = counts is not None
+        taken_keys = []
+        deadline = None if max_time is None else time.time() + max_time
+        while state >= 0 and not trap:
+            chunk = TIME_CHECK_INTERVAL if max_steps is None else min(TIME_CHECK_INTERVAL, max_steps - taken)
+            if chunk <= 0 or (deadline is not None and time.time() >= deadline):
+                break
+            for i in range(chunk):
+                symbols = (t1[c1], t2[c2])
+                key = (state, symbols)
+                if key in table:
+                    (state, newsymbols, directions, trap) = table[key]
+                    (t1[c1], t2[c2]) = newsymbols
+                    if newsymbols[0] != ' ':
+                        if c1 < s1:
+                            s1 = c1
+                        if c1 > e1:
+                            e1 = c1
+                    if newsymbols[1] != ' ':
+                        if c2 < s2:
+                            s2 = c2
+                        if c2 > e2:
+                            e2 = c2
+                    where = (c1, c2)
+                    if counting:
+                        taken_keys.append(key)
+                    c1 = min(max(c1 + directions[0], 0), last)
+                    c2 = min(max(c2 + directions[1], 0), last)
+                    if watch and ((where[0] in cells and newsymbols[0] != symbols[0]) or
+                                  (where[1] in cells and newsymbols[1] != symbols[1]) or c1 in heads or c2 in heads):
+                        trap = True
+                else:
+                    state = -2
+                    trap = table.reject_trap
+                    where = None  # nothing was written
+                taken += 1
+                if state < 0 or trap:
+                    break
+            if counting:  # counted a chunk at a time, which Counter.update() does in C
+                counts.update(taken_keys)
+                del taken_keys[:]
+        (t1, t2) = (make_tape(t1, self.run_length_tape), make_tape(t2, self.run_length_tape))
+        return self._finish_run(((t1, t2), (s1, s2), (e1, e2), (c1, c2), state), taken, breaks, key, where)
+
+    def _finish_run(self, config, taken, breaks, key, where):
+        """Store the configuration reached by run() after the given number of steps, and return the outcome"""
+        if taken > 0:
+            self.config = config
+            self.config_list = [config]
+            self.history_bytes = history_bytes(self)
+            self.step += taken
+        self.breakpoint_reason = None
+        if breaks is not None and taken > 0:
+            self.breakpoint_reason = breaks.explain(self, key, where)
+        if self.config[4] < 0:  # a breakpoint hit by the halting step is still left in breakpoint_reason
+            self.outcome = outcome_of(self.config[4])
+        elif self.breakpoint_reason:
+            self.outcome = BREAKPOINT
+        else:
+            self.outcome = BUDGET_EXHAUSTED
+        return self.outcome
+
     def format_current_config(self):
         """Returns a multi-line string of the current configuration"""
         return self.format_config(self.config)
@@ -382,8 +817,15 @@ class two_tape_TM:
         a dictionary of key-value pairs (q,c):(q',c',D) where D is a 2-tuple of -1, 0, or 1, for left, stay, and right, tape symbols c, c' are tuples of two characters for the two tapes, states q,q' are integers.
         """
         f = open(filename, 'r')
+        d = two_tape_TM.parse_transition_table(f)
+        f.close()
+        return d
+
+    @staticmethod
+    def parse_transition_table(lines):
+        """Parse the lines of a configuration file, given as any iterable of strings, into a transition table (see read_transition_table())"""
         d = {}
-        for line in f:
+        for line in lines:
             seq = line.split()
             if (len(seq) > 0) and (seq[0][0] != '#'):
                 state = int(seq[0])
@@ -406,5 +848,266 @@ class two_tape_TM:
                         direction += (0, )
 
                 d[(state, sym)] = (newstate, newsym, direction)
-        f.close()
         return d
+
+
+class compiled_table(dict):
+    """A transition table for run(), with a flag at the end of every transition telling whether it triggers a breakpoint"""
+    reject_trap = False  # whether falling off the table (and so rejecting) triggers a breakpoint
+
+
+class breakpoints:
+    """Places for run() to stop at before the machine halts.
+
+    Every kind of breakpoint is turned into lookup sets before the run starts: state and transition breakpoints become a
+    flag stored with each transition, step breakpoints shorten the step budget, and tape breakpoints are set lookups on
+    the head position. Cell and head positions count from the first cell of the input (0), and apply to every tape.
+    """
+
+    def __init__(self, states=(), transitions=(), steps=(), cells=(), heads=()):
+        """ Create a set of breakpoints
+
+        Args:
+        states -- stop when the machine enters one of these states
+        transitions -- stop after taking one of these transitions, given as (q, c) keys of the transition table
+        steps -- stop when reaching one of these step numbers
+        cells -- stop when the symbol in one of these cells changes
+        heads -- stop when a head moves onto one of these cells
+        """
+        self.states = set(states)
+        self.transitions = set(transitions)
+        self.steps = sorted(set(steps))
+        self.cells = set(cells)
+        self.heads = set(heads)
+
+    def __len__(self):
+        return len(self.states) + len(self.transitions) + len(self.steps) + len(self.cells) + len(self.heads)
+
+    @staticmethod
+    def parse(text):
+        """Read breakpoints written one per line, as in:
+        state 3
+        transition 2 a (two tape: transition 2 a:B)
+        step 150000
+        cell 5
+        head -4
+        B stands for the blank, as in configuration files. Blank lines and lines starting with # are ignored.
+        Raises a ValueError naming the line for anything else.
+        A breakpoint hit by a step that also halts the machine does not change the outcome of the run, which is the
+        halt, but it is still described in the machine's breakpoint_reason.
+        """
+        states = []
+        transitions = []
+        steps = []
+        cells = []
+        heads = []
+        for line in text.splitlines():
+            seq = line.split()
+            if len(seq) == 0 or seq[0][0] == '#':
+                continue
+            try:
+                if seq[0] == 'state' and len(seq) == 2:
+                    states.append(int(seq[1]))
+                elif seq[0] == 'transition' and len(seq) == 3:
+                    sym = seq[2].replace('B', ' ')
+                    if ':' in sym:
+                        sym = tuple(sym.split(':'))
+                    transitions.append((int(seq[1]), sym))
+                elif seq[0] == 'step' and len(seq) == 2:
+                    steps.append(int(seq[1]))
+                elif seq[0] == 'cell' and len(seq) == 2:
+                    cells.append(int(seq[1]))
+                elif seq[0] == 'head' and len(seq) == 2:
+                    heads.append(int(seq[1]))
+                else:
+                    raise ValueError()
+            except ValueError:
+                raise ValueError("Not a breakpoint: " + line.strip())
+        return breakpoints(states, transitions, steps, cells, heads)
+
+    @staticmethod
+    def format_symbol(sym):
+        """Write the symbol (or the tuple of symbols of a two tape machine) of a transition the way parse() reads it"""
+        if isinstance(sym, tuple):
+            return ':'.join([breakpoints.format_symbol(s) for s in sym])
+        return sym.replace(' ', 'B')
+
+    @staticmethod
+    def origin(tm):
+        """The index in the tape list of the first input cell of the given machine"""
+        if getattr(tm, 'two_way', True):
+            return 10000
+        return 0
+
+    def compile(self, tm, max_steps):
+        """Turn the breakpoints into what the stepping loop of run() needs
+
+        Returns:
+        a tuple (table, cells, heads, max_steps) of the compiled_table, the sets of watched tape indices, and the step budget shortened to stop at the next step breakpoint
+        """
+        table = compiled_table()
+        for (key, transition) in tm.next_state_dict.items():
+            table[key] = transition + (key in self.transitions or transition[0] in self.states, )
+        table.reject_trap = -2 in self.states
+        origin = breakpoints.origin(tm)
+        cells = set(cell + origin for cell in self.cells)
+        heads = set(head + origin for head in self.heads)
+        for step in self.steps:
+            if step > tm.step:
+                if max_steps is None or step - tm.step < max_steps:
+                    max_steps = step - tm.step
+                break
+        return (table, cells, heads, max_steps)
+
+    def explain(self, tm, key, where):
+        """Describe which breakpoints the last step of a run hit, or return None if it hit none
+
+        Args:
+        tm -- the machine, just after the step
+        key -- the (q, c) key of the transition taken in the step
+        where -- the tape indices the heads were over before the step (a tuple, one per tape)
+        """
+        reasons = []
+        state = tm.config[4]
+        origin = breakpoints.origin(tm)
+        if state in self.states:
+            reasons.append("state " + str(state))
+        if key in self.transitions and key in tm.next_state_dict:
+            reasons.append("transition " + str(key[0]) + " " + breakpoints.format_symbol(key[1]))
+        if tm.step in self.steps:
+            reasons.append("step " + str(tm.step))
+        if where is not None:
+            if isinstance(tm.config[0], tuple):
+                (tapes, heads) = (tm.config[0], tm.config[3])
+            else:
+                (tapes, heads) = ((tm.config[0], ), (tm.config[3], ))
+            for i in range(len(tapes)):
+                tape = "tape " + str(i + 1) + " " if len(tapes) > 1 else ""
+                if where[i] is not None and where[i] - origin in self.cells and key is not None:
+                    old = key[1][i] if isinstance(key[1], tuple) else key[1]
+                    if tapes[i][where[i]] != old:
+                        reasons.append(tape + "cell " + str(where[i] - origin) + " changed")
+                if heads[i] - origin in self.heads:
+                    reasons.append(tape + "head at " + str(heads[i] - origin))
+        if len(reasons) == 0:
+            return None
+        return ', '.join(reasons)
+
+
+NO_BREAKPOINTS = breakpoints()
+
+
+class machine_lanes:
+    """Several runs of one machine on different inputs, advanced together in lockstep.
+
+    Every lane is a machine of its own (without history), but they all share the transition table of the machine they were made from, so it is parsed only once.
+    """
+
+    def __init__(self, tm, inputs):
+        """ Make a lane for each input
+
+        Args:
+        tm -- the turing_machine or two_tape_TM to run. Its options (tape kind, run-length tapes) carry over to the lanes
+        inputs -- a list of tape contents, one per lane
+        """
+        self.lanes = []
+        for string in inputs:
+            if isinstance(tm, two_tape_TM):
+                lane = two_tape_TM(tm.file, input=string, keep_history=False, run_length_tape=tm.run_length_tape,
+                                   transitions=tm.next_state_dict)
+            else:
+                lane = turing_machine(tm.file, input=string, bidirectional=tm.two_way, keep_history=False,
+                                      run_length_tape=tm.run_length_tape, transitions=tm.next_state_dict)
+            self.lanes.append(lane)
+
+    def __len__(self):
+        return len(self.lanes)
+
+    def __getitem__(self, i):
+        return self.lanes[i]
+
+    def running(self):
+        """Whether any lane has yet to halt"""
+        for lane in self.lanes:
+            if lane.config[4] >= 0:
+                return True
+        return False
+
+    def tick(self):
+        """Advance every lane that has not halted by one step
+
+        Returns:
+        the list of indices of the lanes that changed, so only those need to be redrawn
+        """
+        changed = []
+        for i in range(len(self.lanes)):
+            lane = self.lanes[i]
+            if lane.config[4] >= 0:
+                lane.next_config()
+                changed.append(i)
+        return changed
+
+
+# saving and resuming runs
+def save_state(tm, filename):
+    """Write the current configuration of a machine to a JSON file, so the run can be carried on later with load_state()
+
+    Only the written part of each tape is stored. The configuration file itself is referred to by name, so it must still be there when the run is loaded.
+    """
+    config = tm.config
+    two_tape = isinstance(tm, two_tape_TM)
+    if two_tape:
+        fields = list(zip(*config[:4]))
+    else:
+        fields = [config[:4]]
+    tapes = []
+    for (tape, start, end, current) in fields:
+        low = min(start, current)
+        high = max(end, current)
+        tapes.append({'start': start, 'end': end, 'head': current, 'offset': low, 'cells': tape[low:high + 1]})
+    state = {
+        'machine': 'two_tape_TM' if two_tape else 'turing_machine',
+        'file': tm.file,
+        'input': tm.inputstring,
+        'bidirectional': getattr(tm, 'two_way', True),
+        'run_length_tape': tm.run_length_tape,
+        'step': tm.step,
+        'state': config[4],
+        'tapes': tapes
+    }
+    f = open(filename, 'w')
+    json.dump(state, f)
+    f.close()
+
+
+def load_state(filename, keep_history=True):
+    """Rebuild a machine from a file written by save_state(), ready to carry on the run from the saved step
+
+    Stepping back to before the saved step re-runs the machine from its input.
+    Returns:
+    a turing_machine or two_tape_TM
+    """
+    f = open(filename, 'r')
+    state = json.load(f)
+    f.close()
+    run_length = state.get('run_length_tape', False)
+    if state['machine'] == 'two_tape_TM':
+        tm = two_tape_TM(state['file'], input=state['input'], keep_history=keep_history, run_length_tape=run_length)
+    else:
+        tm = turing_machine(state['file'], input=state['input'], bidirectional=state['bidirectional'],
+                            keep_history=keep_history, run_length_tape=run_length)
+    length = len(tm.config_list[0][0][0]) if state['machine'] == 'two_tape_TM' else len(tm.config_list[0][0])
+    fields = []
+    for saved in state['tapes']:
+        tape = [' '] * length
+        tape[saved['offset']:saved['offset'] + len(saved['cells'])] = saved['cells']
+        fields.append((make_tape(tape, run_length), saved['start'], saved['end'], saved['head']))
+    if state['machine'] == 'two_tape_TM':
+        (tapes, starts, ends, currents) = zip(*fields)
+        tm.config = (tapes, starts, ends, currents, state['state'])
+    else:
+        tm.config = fields[0] + (state['state'], )
+    tm.config_list = [tm.config]
+    tm.step = state['step']
+    tm.outcome = outcome_of(tm.config[4])
+    return tm
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from turing_machines import turing_machine, two_tape_TM, breakpoints, BREAKPOINT, ACCEPTED, REJECTED
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+# crosses out a's until it reads a b, then rejects at the blank after it
+MACHINE = """0 a 0 X R
+0 b 1 b R
+1 a 0 a R
+0 B -1 B L
+1 B -2 B L
+"""
+
+
+@pytest.fixture
+def machine(tmp_path):
+    path = tmp_path / 'cross.tm'
+    path.write_text(MACHINE)
+    return turing_machine(str(path), input='aab', keep_history=False)
+
+
+@pytest.mark.parametrize('text, step, reason', [
+    ('state 1', 3, 'state 1'),
+    ('transition 0 a', 1, 'transition 0 a'),
+    ('step 2', 2, 'step 2'),
+    ('cell 1', 2, 'cell 1 changed'),
+    ('head 3', 3, 'head at 3'),
+    ('state 1\nhead 3', 3, 'state 1, head at 3'),
+])
+def test_stops_with_reason(machine, text, step, reason):
+    assert machine.run(None, None, breakpoints.parse(text)) == BREAKPOINT
+    assert machine.step == step
+    assert machine.breakpoint_reason == reason
+
+
+def test_resumes_to_next_breakpoint(machine):
+    breaks = breakpoints.parse('# every step in state 0\nstate 0')
+    assert machine.run(None, None, breaks) == BREAKPOINT
+    assert machine.step == 1
+    assert machine.run(None, None, breaks) == BREAKPOINT
+    assert machine.step == 2
+    assert machine.run(None, None, breaks) == REJECTED
+    assert machine.step == 4
+
+
+def test_unchanged_cell_does_not_stop(machine):
+    assert machine.run(None, None, breakpoints.parse('cell 2')) == REJECTED
+    assert machine.breakpoint_reason is None
+
+
+def test_halting_step_keeps_reason(machine):
+    assert machine.run(None, None, breakpoints.parse('transition 1 B')) == REJECTED
+    assert machine.breakpoint_reason == 'transition 1 B'
+
+
+def test_two_tape_reasons():
+    filename = os.path.join(EXAMPLES, 'equalabs_2tape.tm')
+    tm = two_tape_TM(filename, input='ab', keep_history=False)
+    assert tm.run(None, None, breakpoints.parse('transition 1 B:B')) == ACCEPTED
+    assert tm.breakpoint_reason == 'transition 1 B:B'
+    tm = two_tape_TM(filename, input='aabb', keep_history=False)
+    assert tm.run(None, None, breakpoints.parse('head 1')) == BREAKPOINT
+    assert tm.breakpoint_reason == 'tape 1 head at 1, tape 2 head at 1'
+
+
+def test_parse_rejects_nonsense():
+    with pytest.raises(ValueError):
+        breakpoints.parse('state 1\nstop here')
+    with pytest.raises(ValueError):
+        breakpoints.parse('step x')
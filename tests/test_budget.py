@@ -0,0 +1,88 @@
+import os
+
+from turing_machines import turing_machine, two_tape_TM, save_state, load_state, BUDGET_EXHAUSTED, REJECTED
+import simulate
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+REVERSE = os.path.join(EXAMPLES, 'reverse_oneway.tm')
+COUNTER = """# binary counter: increment forever at the right end
+0 B 1 B L
+0 0 0 0 R
+0 1 0 1 R
+1 1 1 0 L
+1 0 0 1 R
+1 B 0 1 R
+"""
+
+
+def counter(tmp_path):
+    path = tmp_path / 'counter.tm'
+    path.write_text(COUNTER)
+    return turing_machine(str(path), keep_history=False)
+
+
+def finished(tm):
+    return (tm.config, tm.step, tm.outcome)
+
+
+def test_step_budget_resumes_exactly():
+    reference = turing_machine(REVERSE, input='01101', bidirectional=False, keep_history=False)
+    assert reference.run(None) != BUDGET_EXHAUSTED
+
+    tm = turing_machine(REVERSE, input='01101', bidirectional=False, keep_history=False)
+    assert tm.run(5) == BUDGET_EXHAUSTED
+    assert tm.step == 5
+    while tm.run(7) == BUDGET_EXHAUSTED:
+        pass
+    assert finished(tm) == finished(reference)
+
+    tm = turing_machine(REVERSE, input='01101', bidirectional=False, keep_history=False)
+    for config in tm.run_tm_iter(4):
+        pass
+    assert tm.outcome == BUDGET_EXHAUSTED and tm.step == 4
+    for config in tm.run_tm_iter(None):
+        pass
+    assert finished(tm) == finished(reference)
+
+
+def test_time_budget_resumes_exactly(tmp_path):
+    tm = counter(tmp_path)
+    assert tm.run(None, 0.05) == BUDGET_EXHAUSTED
+    stopped = tm.step
+    assert stopped > 0
+    tm.run(1000)
+    reference = counter(tmp_path)
+    reference.run(stopped + 1000)
+    assert finished(tm) == finished(reference)
+
+
+def test_save_load_round_trip(tmp_path):
+    tm = counter(tmp_path)
+    tm.run(777)
+    save_state(tm, str(tmp_path / 'run.json'))
+    loaded = load_state(str(tmp_path / 'run.json'), keep_history=False)
+    assert loaded.step == 777
+    loaded.run(500)
+    reference = counter(tmp_path)
+    reference.run(1277)
+    assert finished(loaded) == finished(reference)
+
+    filename = os.path.join(EXAMPLES, 'equalabs_2tape.tm')
+    tm = two_tape_TM(filename, input='aabbab', keep_history=False)
+    tm.run(6)
+    save_state(tm, str(tmp_path / 'two.json'))
+    loaded = load_state(str(tmp_path / 'two.json'), keep_history=False)
+    loaded.run(None)
+    reference = two_tape_TM(filename, input='aabbab', keep_history=False)
+    reference.run(None)
+    assert finished(loaded) == finished(reference)
+
+
+def test_command_line_resume(tmp_path, capsys):
+    saved = str(tmp_path / 'run.json')
+    assert simulate.main([REVERSE, '0110', '--one-way', '--max-steps', '5', '--save-state', saved]) == 4
+    status = simulate.main(['--resume', saved])
+    reference = turing_machine(REVERSE, input='0110', bidirectional=False, keep_history=False)
+    reference.run(None)
+    assert status == (1 if reference.outcome == REJECTED else 0)
+    assert str(reference.step) + ' steps' in capsys.readouterr().out
@@ -0,0 +1,57 @@
+import itertools
+
+from turing_machines import turing_machine
+from equivalence import make_tasks, enumerate_strings, count_strings, equivalence_check, final_state
+
+ACCEPT_ALL = """0 a -1 a R
+0 b -1 b R
+0 B -1 B R
+"""
+REJECT_B = """0 a -1 a R
+0 b -2 b R
+0 B -1 B R
+"""
+LOOP = """0 a 0 a R
+0 B -1 B R
+"""
+
+
+def write(tmp_path, name, spec):
+    path = tmp_path / name
+    path.write_text(spec)
+    return str(path)
+
+
+def test_tasks_cover_every_string_in_shortlex_order():
+    for chunk_size in [1, 4, 4096]:
+        strings = []
+        for (prefix, suffix) in make_tasks('abc', 5, chunk_size):
+            strings.extend(prefix + ''.join(letters) for letters in itertools.product('abc', repeat=suffix))
+        assert strings == list(enumerate_strings('abc', 5))
+        assert len(strings) == count_strings('abc', 5)
+
+
+def test_counterexamples_in_shortlex_order(tmp_path):
+    check = equivalence_check(write(tmp_path, 'all.tm', ACCEPT_ALL), write(tmp_path, 'nob.tm', REJECT_B), 3,
+                              processes=1)
+    assert check.alphabet == 'ab'
+    assert list(check.counterexamples(limit=3)) == [('b', -1, -2), ('ba', -1, -2), ('bb', -1, -2)]
+    assert check.found == 3
+
+
+def test_equivalent_machines(tmp_path):
+    check = equivalence_check(write(tmp_path, 'one.tm', ACCEPT_ALL), write(tmp_path, 'two.tm', ACCEPT_ALL), 4,
+                              processes=1)
+    assert list(check.counterexamples()) == []
+    assert check.checked == check.total == count_strings('ab', 4)
+
+
+def test_step_budget(tmp_path):
+    tm = turing_machine(write(tmp_path, 'loop.tm', LOOP), keep_history=False)
+    assert final_state(tm, 'aaaa', max_steps=3) is None
+    assert final_state(tm, 'aaaa', max_steps=None) == -1
+    # no step limit at all, as with --max-steps 0 on the command line
+    check = equivalence_check(tm.file, write(tmp_path, 'all.tm', ACCEPT_ALL), 3, alphabet='a', max_steps=None,
+                              processes=1)
+    assert list(check.counterexamples()) == []
+    assert check.undecided == 0
@@ -0,0 +1,50 @@
+import collections, os
+
+from turing_machines import turing_machine, two_tape_TM
+from heatmap import count_transitions, edge_counts, heat_color
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+
+
+def test_counts_cover_the_whole_run():
+    tm = turing_machine(os.path.join(EXAMPLES, 'reverse_oneway.tm'), input='0110', bidirectional=False)
+    (counts, path, current) = count_transitions(tm)
+    assert sum(counts.values()) == tm.step
+    assert tm.config[4] < 0
+    assert path is None and current is None
+
+
+def test_path_comes_from_the_same_run():
+    filename = os.path.join(EXAMPLES, 'reverse_oneway.tm')
+    tm = turing_machine(filename, input='0110', bidirectional=False)
+    (whole, none, nothing) = count_transitions(tm)
+    for step in [0, 1, 7, 20]:
+        (counts, path, current) = count_transitions(tm, step=step)
+        assert counts == whole  # pausing for the path changes nothing
+        reference = turing_machine(filename, input='0110', bidirectional=False)
+        reference.run(step)
+        (upto, none, nothing) = count_transitions(reference, max_steps=step)
+        assert path == set(edge_counts(upto, tm.next_state_dict))
+        assert current == reference.config[4]
+
+
+def test_two_tape_counts():
+    tm = two_tape_TM(os.path.join(EXAMPLES, 'equalabs_2tape.tm'), input='aabb')
+    (counts, path, current) = count_transitions(tm, step=3)
+    assert sum(counts.values()) == tm.step
+    assert len(path) > 0
+
+
+def test_edge_counts_adds_up_transitions_per_edge():
+    table = {(0, 'a'): (0, 'a', 1), (0, 'b'): (1, 'b', 1), (1, 'a'): (0, 'a', -1), (1, ' '): (-1, ' ', 0)}
+    counts = collections.Counter({(0, 'a'): 5, (0, 'b'): 2, (1, 'a'): 1, (1, ' '): 1})
+    assert edge_counts(counts, table) == {(0, 0): 5, (0, 1): 2, (1, 0): 1, (1, -1): 1}
+    assert edge_counts(collections.Counter(), table) == {}
+
+
+def test_heat_color_scale():
+    assert heat_color(0, 10) == "0.170 0.300 1.000"
+    assert heat_color(10, 10) == "0.000 1.000 1.000"
+    assert heat_color(0, 0) == "0.170 0.300 1.000"
+    hues = [float(heat_color(hits, 100).split()[0]) for hits in range(101)]
+    assert hues == sorted(hues, reverse=True)
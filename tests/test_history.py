@@ -0,0 +1,41 @@
+from turing_machines import turing_machine, history_bytes
+
+COUNTER = """# binary counter: increment forever at the right end
+0 B 1 B L
+0 0 0 0 R
+0 1 0 1 R
+1 1 1 0 L
+1 0 0 1 R
+1 B 0 1 R
+"""
+
+
+def counter(tmp_path, steps, **options):
+    """A counter machine stepped through its first steps one at a time, so that it keeps its history"""
+    path = tmp_path / 'counter.tm'
+    path.write_text(COUNTER)
+    tm = turing_machine(str(path), run_length_tape=True, **options)
+    for config in tm.run_tm_iter(steps):
+        pass
+    return tm
+
+
+def test_history_stays_within_budget(tmp_path):
+    tm = counter(tmp_path, 3000, history_budget=20000)
+    assert tm.step == 3000
+    assert len(tm.checkpoints) > 0
+    assert history_bytes(tm) <= tm.history_budget
+
+
+def test_go_back_to_step_matches_full_history(tmp_path):
+    full = counter(tmp_path, 3000, history_budget=2**40)
+    assert len(full.checkpoints) == 0
+    reference = list(full.config_list)
+
+    for n in [0, 1, 7, 500, 1234, 2998]:
+        tm = counter(tmp_path, 3000, history_budget=20000)
+        tm.go_back_to_step(n)
+        assert tm.step == n
+        assert tm.config == reference[n]
+        tm.run(3000 - n)  # and the run carries on as before
+        assert tm.config == reference[3000]
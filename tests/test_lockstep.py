@@ -0,0 +1,26 @@
+import itertools, os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from turing_machines import turing_machine
+from lockstep import run_batch
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+
+
+@pytest.mark.parametrize('bidirectional', [True, False])
+@pytest.mark.parametrize('name', ['reverse_oneway.tm', 'create_spaces.tm', 'infinite_loop.tm'])
+def test_matches_run(name, bidirectional):
+    filename = os.path.join(EXAMPLES, name)
+    inputs = [''.join(p) for n in range(5) for p in itertools.product('01', repeat=n)]
+    result = run_batch(turing_machine.read_transition_table(filename), inputs, bidirectional, max_steps=500)
+    for i in range(len(inputs)):
+        tm = turing_machine(filename, input=inputs[i], bidirectional=bidirectional, keep_history=False)
+        tm.run(500)
+        (tape, start, end, head, state) = tm.config
+        assert result.outcome(i) == tm.outcome
+        assert result.steps[i] == tm.step
+        assert result.states[i] == state
+        assert result.tape(i) == ''.join(tape[start:end + 1])
@@ -0,0 +1,59 @@
+import os, random
+
+from rle_tape import rle_tape
+from turing_machines import turing_machine, two_tape_TM, BUDGET_EXHAUSTED
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+
+
+def test_runs_split_and_merge():
+    tape = rle_tape('aaabbb', 10)
+    assert tape.runs() == 3  # aaa, bbb and the blank tail
+    tape[1] = 'x'
+    assert list(tape) == list('axabbb    ')
+    assert tape.runs() == 5
+    tape[1] = 'a'  # writing the old symbol back joins the three pieces again
+    assert tape.runs() == 3
+    tape[3] = 'a'  # growing a run at its edge takes the cell from the next run
+    assert tape.starts == [0, 4, 6]
+    tape[4] = 'a'
+    tape[5] = 'a'  # the last b goes, so the a run meets the blank run
+    assert tape.starts == [0, 6]
+    assert tape.symbols == ['a', ' ']
+    tape[6] = 'a'
+    tape[9] = 'a'
+    assert tape.starts == [0, 7, 9]
+
+
+def test_writes_match_a_list():
+    rng = random.Random(1)
+    cells = [' '] * 50
+    tape = rle_tape(cells)
+    for k in range(2000):
+        i = rng.randrange(len(cells))
+        sym = rng.choice(' ab')
+        cells[i] = sym
+        tape[i] = sym
+        assert list(tape) == cells
+        # runs are maximal: no two neighbouring runs hold the same symbol
+        assert all(tape.symbols[r] != tape.symbols[r + 1] for r in range(tape.runs() - 1))
+    assert tape == cells
+    assert tape[10:20] == cells[10:20]
+
+
+def test_run_writes_to_the_runs():
+    filename = os.path.join(EXAMPLES, 'reverse_oneway.tm')
+    plain = turing_machine(filename, input='0110100', bidirectional=False, keep_history=False)
+    plain.run(None)
+    tm = turing_machine(filename, input='0110100', bidirectional=False, keep_history=False, run_length_tape=True)
+    while tm.run(3) == BUDGET_EXHAUSTED:
+        assert isinstance(tm.config[0], rle_tape)
+    assert tm.config == plain.config and tm.step == plain.step
+
+    filename = os.path.join(EXAMPLES, 'equalabs_2tape.tm')
+    plain = two_tape_TM(filename, input='abbaab', keep_history=False)
+    plain.run(None)
+    tm = two_tape_TM(filename, input='abbaab', keep_history=False, run_length_tape=True)
+    tm.run(None)
+    assert isinstance(tm.config[0][1], rle_tape)
+    assert tm.config == plain.config
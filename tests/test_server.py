@@ -0,0 +1,93 @@
+import asyncio, os, shutil, tempfile, threading, time
+
+import pytest
+
+import tm_server
+from tm_client import simulation_client, simulation_error
+from turing_machines import turing_machine, BUDGET_EXHAUSTED
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+COUNTER = """# binary counter: increment forever at the right end
+0 B 1 B L
+0 0 0 0 R
+0 1 0 1 R
+1 1 1 0 L
+1 0 0 1 R
+1 B 0 1 R
+"""
+
+
+@pytest.fixture(scope='module')
+def client():
+    """A client of a server running in a thread of its own, on a temporary Unix socket"""
+    directory = tempfile.mkdtemp()  # not pytest's tmp_path, which can be too long for a socket path
+    path = os.path.join(directory, 'tm.sock')
+    server = tm_server.simulation_server(workers=2, max_concurrent=4, timeout=5.0)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    def serve():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start(unix_socket=path))
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(server.stop())
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    assert ready.wait(30)
+    with simulation_client(unix_socket=path) as client:
+        yield client
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(30)
+    shutil.rmtree(directory)
+
+
+def spec(name):
+    f = open(os.path.join(EXAMPLES, name))
+    text = f.read()
+    f.close()
+    return text
+
+
+def test_run_matches_simulator(client):
+    machine = client.load(spec('reverse_oneway.tm'))
+    assert machine == tm_server.spec_hash(spec('reverse_oneway.tm'))
+    for string in ['', '0', '0110', '111']:
+        tm = turing_machine(os.path.join(EXAMPLES, 'reverse_oneway.tm'), input=string, keep_history=False)
+        tm.run()
+        result = client.run(machine, string)
+        assert (result['outcome'], result['steps'], result['state']) == (tm.outcome, tm.step, tm.config[4])
+        assert result['tapes'] == [''.join(tm.config[0][tm.config[1]:tm.config[2] + 1])]
+
+
+def test_batch_and_trace(client):
+    machine = client.load(spec('equalabs_2tape.tm'), two_tape=True)
+    results = client.batch(machine, ['ab', 'aab', ''])
+    assert [r['outcome'] for r in results] == [client.run(machine, s)['outcome'] for s in ['ab', 'aab', '']]
+    trace = client.trace(machine, 'abab')
+    assert len(trace['configs']) == trace['steps'] + 1
+    assert len(trace['tapes']) == 2
+    assert client.status()['machines'] >= 2
+
+
+def test_batch_max_time_is_per_input(client):
+    machine = client.load(COUNTER)
+    start = time.time()
+    results = client.batch(machine, ['', '1', '10'], max_steps=0, max_time=0.2)
+    assert time.time() - start < 4.0  # well within the server's timeout
+    for result in results:
+        assert result['outcome'] == BUDGET_EXHAUSTED
+        assert result['steps'] > 0  # each input got a budget of its own, not what the ones before it left over
+
+
+def test_errors(client):
+    with pytest.raises(simulation_error) as error:
+        client.run('0' * 64, '')
+    assert error.value.status == 404
+    with pytest.raises(simulation_error) as error:
+        client.request('/run', {'spec': 'not a transition', 'input': ''})
+    assert error.value.status == 400
+    with pytest.raises(simulation_error) as error:
+        client.request('/nowhere', {})
+    assert error.value.status == 404
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from turing_machines import turing_machine, two_tape_TM
+from tm_trace import trace_writer, trace_reader
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Docs', 'Examples')
+
+
+def record(tm, filename, interval):
+    """Trace a whole run of a machine, and return every configuration of it"""
+    configs = [tm.config]
+    with trace_writer(filename, tm, interval) as trace:
+        trace.write(tm.config)
+        for config in tm.run_tm_iter():
+            trace.write(config)
+            configs.append(config)
+    return configs
+
+
+@pytest.mark.parametrize('interval', [1, 7, 1024])
+def test_one_tape_round_trip(tmp_path, interval):
+    tm = turing_machine(os.path.join(EXAMPLES, 'reverse_oneway.tm'), input='0110', bidirectional=False)
+    configs = record(tm, str(tmp_path / 'run.tmt'), interval)
+    with trace_reader(str(tmp_path / 'run.tmt')) as trace:
+        assert len(trace) == len(configs)
+        assert not trace.two_tape and not trace.two_way
+        for n in range(len(configs)):
+            assert trace.config_at(n) == configs[n]
+
+
+def test_two_tape_round_trip(tmp_path):
+    tm = two_tape_TM(os.path.join(EXAMPLES, 'equalabs_2tape.tm'), input='aabbab')
+    configs = record(tm, str(tmp_path / 'run.tmt'), 5)
+    with trace_reader(str(tmp_path / 'run.tmt')) as trace:
+        assert trace.two_tape
+        for n in range(len(configs)):
+            (tapes, starts, ends, heads, state) = trace.config_at(n)
+            assert (list(tapes[0]), list(tapes[1])) == (list(configs[n][0][0]), list(configs[n][0][1]))
+            assert (starts, ends, heads, state) == tuple(configs[n][1:])
+        with pytest.raises(IndexError):
+            trace.config_at(len(configs))
+
+
+def test_snapshot_interval_must_be_positive(tmp_path):
+    tm = turing_machine(os.path.join(EXAMPLES, 'reverse_oneway.tm'), input='01')
+    for interval in [0, -5]:
+        with pytest.raises(ValueError):
+            trace_writer(str(tmp_path / 'run.tmt'), tm, interval)
+    assert not (tmp_path / 'run.tmt').exists()